@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any, Callable, List
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from lxml import html as lxml_html
+
+from scout_pipeline.collector import parse_html_items, parse_rss_items, resolve_html_encoding
+from scout_pipeline.config import HTMLSource, RSSSource
+from scout_pipeline.extractor import normalize_items
+from scout_pipeline.models import Item
+
+TRENDING_SOURCE = HTMLSource.model_validate(
+    {
+        "type": "html",
+        "name": "github_trending",
+        "url": "https://github.com/trending",
+        "list_selector": "article.Box-row",
+        "fields": {
+            "title": {"selector": "h2 a"},
+            "url": {"selector": "h2 a", "attr": "href"},
+            "description": {"selector": "p"},
+            "comments": {"selector": "a.Link--muted", "multiple": True},
+            "media": {"selector": "img.avatar", "attr": "src", "multiple": True},
+        },
+    }
+)
+
+
+def _trending_page(rows: int) -> str:
+    """生成接近 GitHub Trending 结构的列表页，用于稳定复现。"""
+
+    parts = [
+        "<!DOCTYPE html><html lang='en'><head><meta charset='utf-8'><title>Trending</title>",
+        "<script>window.__data = {};</script><style>.Box-row{padding:16px}</style></head><body>",
+        "<header>" + "<nav><a href='/'>GitHub</a></nav>" * 20 + "</header><main><div class='Box'>",
+    ]
+    for idx in range(rows):
+        parts.append(
+            f"""
+            <article class="Box-row">
+              <div class="float-right"><a class="btn-sm" href="/login">Star</a></div>
+              <h2 class="h3 lh-condensed">
+                <svg aria-hidden="true" height="16" viewBox="0 0 16 16"><path d="M2 2.5A2.5"></path></svg>
+                <a href="/owner{idx}/repo-{idx}"><span class="text-normal">owner{idx} /</span> repo-{idx}</a>
+              </h2>
+              <p class="col-9 color-fg-muted my-1 pr-4">An open source AI agent framework number {idx}
+                 with <code>LLM</code> tooling, RAG pipelines and multi-modal support. 开源智能体框架，支持大模型工具调用。</p>
+              <div class="f6 color-fg-muted mt-2">
+                <span itemprop="programmingLanguage">Python</span>
+                <a class="Link--muted d-inline-block mr-3" href="/owner{idx}/repo-{idx}/stargazers">{idx * 37} stars</a>
+                <a class="Link--muted d-inline-block mr-3" href="/owner{idx}/repo-{idx}/forks">{idx * 3} forks</a>
+                <span class="d-inline-block mr-3">Built by
+                  {''.join(f'<a href="/u{idx}_{n}"><img class="avatar mb-1" src="https://avatars.githubusercontent.com/u/{idx}{n}?s=40" width="20" height="20"></a>' for n in range(5))}
+                </span>
+              </div>
+            </article>
+            """
+        )
+    parts.append("</div></main>" + "<footer><ul>" + "<li><a href='/about'>About</a></li>" * 30 + "</ul></footer></body></html>")
+    return "".join(parts)
+
+
+def _legacy_extract_field(soup: BeautifulSoup, selector: str, attr: str | None, multiple: bool) -> Any:
+    nodes = soup.select(selector)
+    if not nodes:
+        return [] if multiple else ""
+    if multiple:
+        return [node.get(attr, "").strip() if attr else node.get_text(strip=True) for node in nodes]
+    node = nodes[0]
+    return node.get(attr, "").strip() if attr else node.get_text(strip=True)
+
+
+def _legacy_parse_html(source: HTMLSource, text: str) -> List[dict[str, Any]]:
+    """旧实现：每行序列化后用 BeautifulSoup 重新解析。"""
+
+    soup = BeautifulSoup(text, "lxml")
+    rows: List[dict[str, Any]] = []
+    for row in soup.select(source.list_selector):
+        row_soup = BeautifulSoup(str(row), "lxml")
+        values = {
+            name: _legacy_extract_field(row_soup, field.selector, field.attr, field.multiple)
+            for name, field in source.fields.items()
+        }
+        values["url"] = urljoin(str(source.url), str(values.get("url", "")))
+        rows.append(values)
+    return rows
+
+
+RSS_SOURCE = RSSSource(type="rss", name="36kr_news", url="https://36kr.com/feed")
+
+_RSS_ITEM_BODY = (
+    '<p style="text-align:center">36氪获悉，某公司发布了新一代<strong>大模型</strong>产品，支持多模态推理与智能体编排。</p>' * 12
+    + "<p><img src='https://img.36krcdn.com/a.png?x=1&y=2' alt='x'/><IMG SRC=https://img.36krcdn.com/b.png></p>"
+    + "<script>track()</script>"
+)
+
+
+def _rss_feed(entries: int) -> bytes:
+    items = "".join(
+        f"""<item><title>AI 新闻 {idx} &amp; 更多</title><link>https://36kr.com/p/{idx}</link>
+        <description><![CDATA[{_RSS_ITEM_BODY}]]></description>
+        <pubDate>Mon, 06 Jan 2025 10:{idx % 60:02d}:00 +0800</pubDate><guid>https://36kr.com/p/{idx}</guid>
+        <comments>https://36kr.com/p/{idx}#comments</comments>
+        <enclosure url="https://img.36krcdn.com/{idx}.mp4" type="video/mp4"/></item>"""
+        for idx in range(entries)
+    )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>36kr</title>'
+        f"<link>https://36kr.com</link>{items}</channel></rss>"
+    ).encode("utf-8")
+
+
+def _rss_corpus() -> List[bytes]:
+    """覆盖 RSS 2.0 / RSS 1.0 / Atom 常见写法的对照语料。"""
+
+    rss2 = (
+        '<?xml version="1.0" encoding="utf-8"?><rss version="2.0" '
+        'xmlns:content="http://purl.org/rss/1.0/modules/content/" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        "<channel><title>t</title>"
+        "<item><title>A &amp; B</title><guid>https://a.com/1</guid>"
+        "<content:encoded><![CDATA[<p>only <img src='/a.png' onerror=\"x\"> <script>bad()</script>&nbsp;x</p>]]></content:encoded>"
+        "<dc:date>2025-01-06T10:00:00+08:00</dc:date></item>"
+        "<item><title><![CDATA[CDATA title]]></title><link> https://a.com/2 </link>"
+        "<description>&lt;p&gt;A &amp;amp; B &amp; C&lt;/p&gt;</description>"
+        "<pubDate>Mon, 06 Jan 2025 10:00:00 +0800</pubDate><comments>https://a.com/2#c</comments></item>"
+        "<item><title>plain</title><link>https://a.com/3</link><description>plain text &amp; more</description></item>"
+        "<item><title>guid</title><guid isPermaLink=\"false\">abc</guid><description>x</description></item>"
+        "</channel></rss>"
+    )
+    rss1 = (
+        '<?xml version="1.0"?><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" '
+        'xmlns="http://purl.org/rss/1.0/" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+        '<channel rdf:about="https://b.com"><title>b</title></channel>'
+        '<item rdf:about="https://b.com/1"><title>RDF item</title><link>https://b.com/1</link>'
+        "<description>desc</description><dc:date>2025-01-06T02:00:00Z</dc:date></item></rdf:RDF>"
+    )
+    atom = (
+        '<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom"><title>c</title>'
+        '<entry><title type="html">A &amp;amp; &lt;b&gt;B&lt;/b&gt;</title><link href="https://c.com/1"/>'
+        '<link rel="enclosure" href="https://c.com/v.mp4" type="video/mp4"/>'
+        '<content type="html">&lt;p&gt;c &lt;img src="https://c.com/i.png"&gt;&lt;/p&gt;</content>'
+        "<updated>2025-01-06T10:00:00Z</updated></entry>"
+        '<entry><title>T</title><link rel="self" href="https://c.com/self"/>'
+        '<link rel="alternate" type="application/pdf" href="https://c.com/pdf"/>'
+        '<link rel="alternate" type="text/html" href="https://c.com/html"/><summary>s</summary>'
+        "<published>2025-01-06T10:00:00+08:00</published></entry></feed>"
+    )
+    broken = '<?xml version="1.0"?><rss version="2.0"><channel><item><title>x &nbsp; y</title><link>https://d.com/1</link></item></channel></rss>'
+    return [text.encode("utf-8") for text in (rss2, rss1, atom, broken)] + [_rss_feed(5)]
+
+
+def _item_key(item: Item) -> tuple:
+    return (
+        item.title,
+        item.url,
+        item.description,
+        item.published_at,
+        item.comments,
+        [(media.url, media.media_type) for media in item.media],
+    )
+
+
+def _rss_identical(content: bytes) -> bool:
+    fast, _ = parse_rss_items(RSS_SOURCE, content, fast_parser=True)
+    slow, _ = parse_rss_items(RSS_SOURCE, content, fast_parser=False)
+    return [_item_key(item) for item in normalize_items(fast)] == [
+        _item_key(item) for item in normalize_items(slow)
+    ]
+
+
+def _timeit(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_html(rows: int, repeat: int) -> None:
+    text = _trending_page(rows)
+    content = text.encode("utf-8")
+    legacy = _legacy_parse_html(TRENDING_SOURCE, text)
+    current = parse_html_items(TRENDING_SOURCE, content)
+    same = [
+        (row["title"], row["url"], row["description"], row["comments"], row["media"]) for row in legacy
+    ] == [(item.title, item.url, item.description, item.comments, [m.url for m in item.media]) for item in current]
+
+    legacy_s = _timeit(lambda: _legacy_parse_html(TRENDING_SOURCE, text), repeat)
+    current_s = _timeit(lambda: parse_html_items(TRENDING_SOURCE, content), repeat)
+    print(
+        f"html\trows={rows}\tpage_kb={len(text) // 1024}\tlegacy_ms={legacy_s * 1000:.1f}\t"
+        f"lxml_ms={current_s * 1000:.1f}\tspeedup={legacy_s / current_s:.1f}x\tidentical={same}"
+    )
+
+
+def _response_text(content: bytes, content_type: str | None) -> str:
+    response = requests.Response()
+    response._content = content
+    if content_type:
+        response.headers["Content-Type"] = content_type
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response.text
+
+
+def bench_charset(rows: int, repeat: int) -> None:
+    """对比 response.text（缺 charset 时整页探测编码）与按字节直接交给 lxml。"""
+
+    text = _trending_page(rows).replace("<meta charset='utf-8'>", "")
+    expected = [(item.title, item.description) for item in parse_html_items(TRENDING_SOURCE, text.encode("utf-8"), "text/html; charset=utf-8")]
+    cases = [
+        ("header", text.encode("utf-8"), "text/html; charset=utf-8"),
+        ("meta", text.replace("<title>", "<meta charset='gbk'><title>").encode("gb18030"), None),
+        ("sniff-utf8", text.encode("utf-8"), None),
+        ("sniff-gb18030", text.encode("gb18030"), None),
+    ]
+    for name, content, content_type in cases:
+        decoded = [(item.title, item.description) for item in parse_html_items(TRENDING_SOURCE, content, content_type)]
+        legacy_s = _timeit(
+            lambda: lxml_html.document_fromstring(_response_text(content, content_type)), repeat
+        )
+        current_s = _timeit(lambda: parse_html_items(TRENDING_SOURCE, content, content_type), repeat)
+        parse_only_s = _timeit(
+            lambda: lxml_html.document_fromstring(
+                content, parser=lxml_html.HTMLParser(encoding=resolve_html_encoding(content, content_type))
+            ),
+            repeat,
+        )
+        print(
+            f"charset\t{name}\tpage_kb={len(content) // 1024}\tresponse_text_parse_ms={legacy_s * 1000:.1f}\t"
+            f"bytes_parse_ms={parse_only_s * 1000:.1f}\tbytes_parse_extract_ms={current_s * 1000:.1f}\t"
+            f"speedup={legacy_s / parse_only_s:.1f}x\tdecoded_ok={decoded == expected}"
+        )
+
+
+def bench_rss(entries: int, repeat: int, corpus: List[bytes]) -> None:
+    content = _rss_feed(entries)
+    identical = all(_rss_identical(feed) for feed in corpus)
+    legacy_s = _timeit(lambda: parse_rss_items(RSS_SOURCE, content, fast_parser=False), repeat)
+    current_s = _timeit(lambda: parse_rss_items(RSS_SOURCE, content, fast_parser=True), repeat)
+    print(
+        f"rss\tentries={entries}\tfeed_kb={len(content) // 1024}\tfeedparser_ms={legacy_s * 1000:.1f}\t"
+        f"iterparse_ms={current_s * 1000:.1f}\tspeedup={legacy_s / current_s:.1f}x\t"
+        f"identical={identical} (corpus={len(corpus)})"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ScoutX collector parsing")
+    parser.add_argument("--rows", type=int, nargs="+", default=[25, 100, 500])
+    parser.add_argument("--entries", type=int, nargs="+", default=[30, 200])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--feeds", nargs="*", default=[], help="录制的 feed 文件，加入一致性校验语料")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        bench_html(rows, args.repeat)
+    bench_charset(max(args.rows), args.repeat)
+
+    corpus = _rss_corpus()
+    for path in args.feeds:
+        with open(path, "rb") as handle:
+            corpus.append(handle.read())
+    for entries in args.entries:
+        bench_rss(entries, args.repeat, corpus)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from typing import Callable, List
+
+from scout_pipeline.config import DedupConfig
+from scout_pipeline.deduper import Deduper
+from scout_pipeline.models import Item
+from scout_pipeline.report_store import fingerprint_item
+
+
+def _legacy_filter_new(sqlite_path: str, items: List[Item]) -> List[Item]:
+    """旧版逐条 SELECT + INSERT 的实现，作为对照。"""
+
+    new_items: List[Item] = []
+    with sqlite3.connect(sqlite_path) as conn:
+        for item in items:
+            fp = fingerprint_item(item)
+            cur = conn.execute("SELECT 1 FROM items WHERE id=?", (fp,))
+            if cur.fetchone():
+                continue
+            conn.execute("INSERT INTO items (id, url, title) VALUES (?, ?, ?)", (fp, item.url, item.title))
+            new_items.append(item)
+    return new_items
+
+
+def _item(idx: int) -> Item:
+    return Item(source="bench", title=f"Bench item {idx}", url=f"https://example.com/posts/{idx}", description="")
+
+
+def _seed(sqlite_path: str, existing: int) -> None:
+    Deduper(sqlite_path)
+    with sqlite3.connect(sqlite_path) as conn:
+        conn.executemany(
+            "INSERT INTO items (id, url, title) VALUES (?, ?, ?)",
+            ((fingerprint_item(item), item.url, item.title) for item in map(_item, range(existing))),
+        )
+
+
+def _batch(existing: int, size: int) -> List[Item]:
+    """一半已存在、一半新条目，另有约 10% 批内重复。"""
+
+    items = [_item(existing - size // 2 + idx) for idx in range(size)]
+    return items + items[: size // 10]
+
+
+def _timeit(seed_path: str, work_path: str, func: Callable[[], List[Item]], repeat: int) -> tuple[float, List[Item]]:
+    best = float("inf")
+    result: List[Item] = []
+    for _ in range(repeat):
+        shutil.copyfile(seed_path, work_path)
+        if os.path.exists(f"{seed_path}.bloom"):
+            shutil.copyfile(f"{seed_path}.bloom", f"{work_path}.bloom")
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bench_filter_new(workdir: str, existing: int, batch_size: int, repeat: int) -> None:
+    seed_path = os.path.join(workdir, f"seed_{existing}.db")
+    work_path = os.path.join(workdir, "work.db")
+    if not os.path.exists(seed_path):
+        _seed(seed_path, existing)
+        Deduper(seed_path, DedupConfig(bloom_filter=True)).close()
+    items = _batch(existing, batch_size)
+
+    def _bloom_filter_new() -> List[Item]:
+        deduper = Deduper(work_path, DedupConfig(bloom_filter=True))
+        try:
+            return deduper.filter_new(items)
+        finally:
+            deduper.close()
+
+    legacy_s, legacy = _timeit(seed_path, work_path, lambda: _legacy_filter_new(work_path, items), repeat)
+    batched_s, batched = _timeit(seed_path, work_path, lambda: Deduper(work_path).filter_new(items), repeat)
+    bloom_s, bloom = _timeit(seed_path, work_path, _bloom_filter_new, repeat)
+    print(
+        f"dedup\texisting={existing}\tbatch={len(items)}\tnew={len(batched)}\t"
+        f"per_item_ms={legacy_s * 1000:.1f}\tbatched_ms={batched_s * 1000:.1f}\tbloom_ms={bloom_s * 1000:.1f}\t"
+        f"speedup_batched={legacy_s / batched_s:.1f}x\tspeedup_bloom={legacy_s / bloom_s:.1f}x\t"
+        f"identical={legacy == batched == bloom}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ScoutX Deduper.filter_new")
+    parser.add_argument("--existing", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--batch", type=int, nargs="+", default=[200, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="scoutx-bench-") as workdir:
+        for existing in args.existing:
+            for batch_size in args.batch:
+                bench_filter_new(workdir, existing, batch_size, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
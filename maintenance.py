@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+
+from scout_pipeline.config import DedupConfig
+from scout_pipeline.deduper import Deduper
+from scout_pipeline.maintenance import list_maintenance_runs, migrate_fingerprints, run_maintenance
+from scout_pipeline.utils import load_config
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ScoutX database maintenance")
+    parser.add_argument("--config", default="config.yaml")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "migrate-fingerprints",
+        help="Re-fingerprint stored items, reports, LLM queue and their references with canonicalised URLs",
+    )
+    subparsers.add_parser("rebuild-bloom", help="Rebuild the dedup Bloom filter from the items table")
+    subparsers.add_parser("run", help="Apply TTLs, build missing indexes and run incremental VACUUM")
+    history = subparsers.add_parser("history", help="Show recent maintenance runs")
+    history.add_argument("--limit", type=int, default=10)
+    return parser.parse_args()
+
+
+def rebuild_bloom(sqlite_path: str, dedup: DedupConfig) -> None:
+    # 构造时不加载旧文件，直接按配置重建。
+    deduper = Deduper(sqlite_path, dedup.model_copy(update={"bloom_filter": False}))
+    deduper.rebuild_bloom()
+    deduper.close()
+
+
+def main() -> int:
+    args = parse_args()
+    config = load_config(args.config)
+    sqlite_path = config.storage.sqlite_path
+
+    if args.command == "migrate-fingerprints":
+        stats = migrate_fingerprints(sqlite_path)
+        print("[maintenance] migrate-fingerprints " + " ".join(f"{key}={value}" for key, value in stats.items()))
+        # 指纹改写不会推进 rowid，Bloom filter 需要显式重建。
+        if config.dedup.bloom_filter:
+            rebuild_bloom(sqlite_path, config.dedup)
+    elif args.command == "rebuild-bloom":
+        rebuild_bloom(sqlite_path, config.dedup)
+    elif args.command == "run":
+        details = run_maintenance(sqlite_path, config.maintenance)
+        print(f"[maintenance] {json.dumps(details, ensure_ascii=False)}")
+    elif args.command == "history":
+        for run in list_maintenance_runs(sqlite_path, args.limit):
+            print(f"{run['started_at']} -> {run['finished_at']} {json.dumps(run['details'], ensure_ascii=False)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,15 +1,31 @@
 __all__ = [
+    "canonical",
     "config",
     "models",
     "collector",
+    "concurrency",
     "extractor",
+    "http_client",
+    "image_probe",
+    "keywords",
+    "maintenance",
+    "bloom",
     "deduper",
+    "neardup",
+    "feed_parser",
+    "feed_state",
     "analyst",
+    "llm_cache",
+    "ratelimit",
     "creator",
     "media",
+    "media_store",
     "notifier",
     "publisher",
     "pipeline",
+    "prompting",
+    "ranking",
+    "relevance",
     "scheduler",
     "utils",
 ]
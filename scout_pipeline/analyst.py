@@ -1,23 +1,40 @@
 from __future__ import annotations
 
 import json
-from typing import Tuple
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
-import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import RetryCallState, retry, stop_after_attempt, wait_exponential
 
+from scout_pipeline import http_client
+from scout_pipeline.concurrency import ordered_map
 from scout_pipeline.config import LLMConfig
+from scout_pipeline.llm_cache import LLMCache
 from scout_pipeline.models import Item, LLMFilterResult
+from scout_pipeline.prompting import estimate_tokens, render_prompt
+from scout_pipeline.ratelimit import DEFAULT_RETRY_AFTER, limiter_for, parse_retry_after
 from scout_pipeline.utils import require_env
 
 
+class LLMRateLimitError(RuntimeError):
+    def __init__(self, message: str, retry_after: Optional[float]) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+_backoff = wait_exponential(min=2, max=10)
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    # 429 按服务端的 Retry-After 等待，其他错误指数退避。
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    if isinstance(exc, LLMRateLimitError) and exc.retry_after is not None:
+        return exc.retry_after
+    return _backoff(retry_state)
+
+
 def _build_prompt(config: LLMConfig, item: Item) -> str:
-    return config.filter_user_prompt.format(
-        title=item.title,
-        url=item.url,
-        description=item.description,
-        comments="\n".join(item.comments),
-    )
+    return render_prompt(config.filter_user_prompt, item, config.prompt_budget)
 
 
 def _parse_filter_response(text: str) -> Tuple[bool, float, str]:
@@ -38,9 +55,12 @@ def _parse_filter_response(text: str) -> Tuple[bool, float, str]:
     return passed, score, normalized
 
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(min=2, max=10))
-def call_llm(config: LLMConfig, system_prompt: str, user_prompt: str) -> str:
+@retry(stop=stop_after_attempt(3), wait=_retry_wait)
+def _request_completion(config: LLMConfig, system_prompt: str, user_prompt: str) -> str:
     api_key = require_env(config.api_key_env)
+    limiter = limiter_for(config)
+    estimated = estimate_tokens(system_prompt) + estimate_tokens(user_prompt)
+    limiter.acquire(estimated)
     url = f"{config.api_base}/chat/completions"
     payload = {
         "model": config.model,
@@ -51,15 +71,134 @@ def call_llm(config: LLMConfig, system_prompt: str, user_prompt: str) -> str:
         ],
     }
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    response = requests.post(url, headers=headers, data=json.dumps(payload), timeout=60)
+    response = http_client.get_session().post(
+        url, headers=headers, data=json.dumps(payload), timeout=http_client.timeout(60)
+    )
+    if response.status_code == 429:
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        limiter.pause(retry_after if retry_after is not None else DEFAULT_RETRY_AFTER)
+        raise LLMRateLimitError(f"LLM rate limited: {response.text[:200]}", retry_after)
     if not response.ok:
         raise RuntimeError(f"LLM request failed {response.status_code}: {response.text[:500]}")
     data = response.json()
+    limiter.record_usage(estimated, (data.get("usage") or {}).get("total_tokens"))
     return data["choices"][0]["message"]["content"]
 
 
-def filter_item(config: LLMConfig, item: Item) -> LLMFilterResult:
+def call_llm(config: LLMConfig, system_prompt: str, user_prompt: str, cache: Optional[LLMCache] = None) -> str:
+    """调用 chat/completions；传入 cache 时先查缓存，成功的响应写回缓存。"""
+
+    use_cache = cache is not None and cache.applies(config)
+    if use_cache:
+        cached = cache.get(config, system_prompt, user_prompt)
+        if cached is not None:
+            return cached
+    text = _request_completion(config, system_prompt, user_prompt)
+    if use_cache:
+        cache.put(config, system_prompt, user_prompt, text)
+    return text
+
+
+def filter_item(config: LLMConfig, item: Item, cache: Optional[LLMCache] = None) -> LLMFilterResult:
     user_prompt = _build_prompt(config, item)
-    text = call_llm(config, config.filter_system_prompt, user_prompt)
+    text = call_llm(config, config.filter_system_prompt, user_prompt, cache)
     passed, score, rationale = _parse_filter_response(text)
     return LLMFilterResult(passed=passed, score=score, rationale=rationale)
+
+
+BATCH_FILTER_INSTRUCTIONS = """下面会给出多条候选，每条以 [id=N] 开头。请按同样的标准逐条评估，只输出 JSON，不要输出其他文字：
+{"results": [{"id": N, "passed": true 或 false, "score": 1-10 的数字, "rationale": "一句话理由"}]}
+每个 id 都必须出现且只出现一次。"""
+# 批量回答缺条目时，只把缺的条目再批量问一轮，仍缺的逐条打分。
+BATCH_ROUNDS = 2
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+
+def _build_batch_prompt(config: LLMConfig, entries: Sequence[Tuple[int, Item]]) -> str:
+    return "\n\n".join(f"[id={idx}]\n{_build_prompt(config, item)}" for idx, item in entries)
+
+
+def extract_json(text: str) -> Any:
+    text = _FENCE.sub("", text.strip())
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    # 模型常在 JSON 前后加说明文字，截取最外层的对象或数组再试一次。
+    for start_char, end_char in (("{", "}"), ("[", "]")):
+        start, end = text.find(start_char), text.rfind(end_char)
+        if 0 <= start < end:
+            try:
+                return json.loads(text[start : end + 1])
+            except ValueError:
+                continue
+    return None
+
+
+def as_bool(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().upper() in {"TRUE", "FALSE"}:
+        return value.strip().upper() == "TRUE"
+    return None
+
+
+def _parse_batch_response(text: str, expected: Set[int]) -> Dict[int, LLMFilterResult]:
+    """解析批量打分结果，只保留 id 合法、字段齐全的条目；其余视为缺失。"""
+
+    data = extract_json(text)
+    entries = data.get("results") if isinstance(data, dict) else data
+    results: Dict[int, LLMFilterResult] = {}
+    if not isinstance(entries, list):
+        return results
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            idx = int(entry.get("id"))
+            score = float(entry.get("score"))
+        except (TypeError, ValueError):
+            continue
+        passed = as_bool(entry.get("passed"))
+        if idx not in expected or idx in results or passed is None:
+            continue
+        results[idx] = LLMFilterResult(passed=passed, score=score, rationale=str(entry.get("rationale") or ""))
+    return results
+
+
+def filter_batch(config: LLMConfig, items: Sequence[Item], cache: Optional[LLMCache] = None) -> List[LLMFilterResult]:
+    """一次请求给多条打分，结果顺序与 items 一致。"""
+
+    system_prompt = f"{config.filter_system_prompt}\n\n{BATCH_FILTER_INSTRUCTIONS}"
+    results: Dict[int, LLMFilterResult] = {}
+    pending = list(range(len(items)))
+    for _ in range(BATCH_ROUNDS):
+        if not pending:
+            break
+        try:
+            text = call_llm(config, system_prompt, _build_batch_prompt(config, [(i, items[i]) for i in pending]), cache)
+        except Exception as exc:
+            print(f"[analyst][warn] batch filter failed for {len(pending)} items: {exc}")
+            break
+        parsed = _parse_batch_response(text, set(pending))
+        if not parsed:
+            # 同样的 prompt 会命中同样的（缓存）回答，再问一轮没有意义。
+            break
+        results.update(parsed)
+        pending = [i for i in pending if i not in results]
+    for i in pending:
+        results[i] = filter_item(config, items[i], cache)
+    return [results[i] for i in range(len(items))]
+
+
+def filter_items(
+    config: LLMConfig, items: Sequence[Item], cache: Optional[LLMCache] = None, max_workers: int = 1
+) -> List[LLMFilterResult]:
+    """按 llm.batch_size 分批并发打分。"""
+
+    size = max(1, config.batch_size)
+    chunks = [items[start : start + size] for start in range(0, len(items), size)]
+    results: List[LLMFilterResult] = []
+    for chunk_results in ordered_map(lambda chunk: filter_batch(config, chunk, cache), chunks, max_workers, name="llm"):
+        results.extend(chunk_results)
+    return results
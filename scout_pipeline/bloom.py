@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+from functools import lru_cache
+from typing import Iterable, List, Tuple
+
+_MAGIC = b"SXBF"
+_VERSION = 1
+# magic, version, num_blocks, num_hashes, capacity, count, synced_rowid, fp_rate
+_HEADER = struct.Struct("<4sIQIQQqd")
+_HEADER_SIZE = 64
+
+# 分块 Bloom filter：每个键的全部位落在同一个 64 字节块里，一次切片读写即可。
+_BLOCK_BYTES = 64
+_BLOCK_BITS = _BLOCK_BYTES * 8
+# 块内位模式由两张 4096 项的预计算表各取一项组合而成，避免逐位循环。
+_PATTERN_BITS = 12
+_PATTERN_MASK = (1 << _PATTERN_BITS) - 1
+# 分块带来的误判率上升用多 20% 的空间补偿。
+_BLOCK_OVERHEAD = 1.2
+
+
+def optimal_size(capacity: int, fp_rate: float) -> Tuple[int, int]:
+    """按容量和目标误判率计算块数与每个键置位的个数 k。"""
+
+    capacity = max(capacity, 1)
+    num_bits = -capacity * math.log(fp_rate) / (math.log(2) ** 2) * _BLOCK_OVERHEAD
+    num_blocks = max(1, math.ceil(num_bits / _BLOCK_BITS))
+    num_hashes = max(2, round(-math.log(fp_rate) / math.log(2)))
+    return num_blocks, num_hashes
+
+
+@lru_cache(maxsize=4)
+def _patterns(num_hashes: int) -> Tuple[List[int], List[int]]:
+    """两张位模式表，各含 ceil(k/2) 个位；只依赖 blake2b，跨进程、跨版本保持一致。"""
+
+    bits = (num_hashes + 1) // 2
+    tables: List[List[int]] = []
+    for table in range(2):
+        entries = []
+        for idx in range(1 << _PATTERN_BITS):
+            digest = hashlib.blake2b(f"{table}:{idx}".encode("ascii"), digest_size=2 * bits).digest()
+            mask = 0
+            for pos in range(bits):
+                mask |= 1 << (int.from_bytes(digest[2 * pos : 2 * pos + 2], "little") % _BLOCK_BITS)
+            entries.append(mask)
+        tables.append(entries)
+    return tables[0], tables[1]
+
+
+def _key_hash(key: str) -> int:
+    # 去重指纹本身就是 md5 十六进制串，直接当作均匀哈希使用。
+    if len(key) == 32:
+        try:
+            return int(key, 16)
+        except ValueError:
+            pass
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest(), "little")
+
+
+class BloomFilter:
+    """持久化到文件、通过 mmap 读写的 Bloom filter。
+
+    只会误判“可能存在”，不会漏判，因此调用方对“可能存在”的键仍需回查权威存储。
+    文件头记录容量、已写入数量和与 SQLite 同步到的 rowid，用于判断是否需要重建。
+    """
+
+    def __init__(self, path: str, handle, mm: mmap.mmap) -> None:
+        self.path = path
+        self._handle = handle
+        self._mm = mm
+        (
+            magic,
+            version,
+            self.num_blocks,
+            self.num_hashes,
+            self.capacity,
+            self.count,
+            self.synced_rowid,
+            self.fp_rate,
+        ) = _HEADER.unpack_from(mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            mm.close()
+            handle.close()
+            raise ValueError(f"Not a ScoutX bloom filter: {path}")
+        if len(mm) != _HEADER_SIZE + self.num_blocks * _BLOCK_BYTES:
+            mm.close()
+            handle.close()
+            raise ValueError(f"Truncated bloom filter: {path}")
+        self._low, self._high = _patterns(self.num_hashes)
+
+    @classmethod
+    def create(cls, path: str, capacity: int, fp_rate: float) -> "BloomFilter":
+        num_blocks, num_hashes = optimal_size(capacity, fp_rate)
+        with open(path, "wb") as handle:
+            header = _HEADER.pack(_MAGIC, _VERSION, num_blocks, num_hashes, capacity, 0, 0, fp_rate)
+            handle.write(header.ljust(_HEADER_SIZE, b"\0"))
+            handle.truncate(_HEADER_SIZE + num_blocks * _BLOCK_BYTES)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path: str) -> "BloomFilter":
+        handle = open(path, "r+b")
+        try:
+            mm = mmap.mmap(handle.fileno(), 0)
+        except Exception:
+            handle.close()
+            raise
+        return cls(path, handle, mm)
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
+
+    def _locate(self, key: str) -> Tuple[int, int]:
+        value = _key_hash(key)
+        offset = _HEADER_SIZE + (value >> 2 * _PATTERN_BITS) % self.num_blocks * _BLOCK_BYTES
+        mask = self._low[value & _PATTERN_MASK] | self._high[value >> _PATTERN_BITS & _PATTERN_MASK]
+        return offset, mask
+
+    def __contains__(self, key: str) -> bool:
+        offset, mask = self._locate(key)
+        return int.from_bytes(self._mm[offset : offset + _BLOCK_BYTES], "little") & mask == mask
+
+    def add(self, key: str) -> None:
+        offset, mask = self._locate(key)
+        block = int.from_bytes(self._mm[offset : offset + _BLOCK_BYTES], "little")
+        self._mm[offset : offset + _BLOCK_BYTES] = (block | mask).to_bytes(_BLOCK_BYTES, "little")
+        self.count += 1
+
+    def update(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.add(key)
+
+    def flush(self, synced_rowid: int | None = None, sync: bool = False) -> None:
+        """写回文件头；mmap 的修改对其他进程立即可见，sync=True 时才强制落盘。"""
+
+        if synced_rowid is not None:
+            self.synced_rowid = synced_rowid
+        _HEADER.pack_into(
+            self._mm,
+            0,
+            _MAGIC,
+            _VERSION,
+            self.num_blocks,
+            self.num_hashes,
+            self.capacity,
+            self.count,
+            self.synced_rowid,
+            self.fp_rate,
+        )
+        if sync:
+            self._mm.flush()
+
+    def close(self) -> None:
+        if not self._mm.closed:
+            self.flush(sync=True)
+            self._mm.close()
+        self._handle.close()
+
+
+def build_bloom_filter(path: str, keys: Iterable[str], capacity: int, fp_rate: float, synced_rowid: int) -> BloomFilter:
+    """在临时文件里写好再原子替换，重建过程中旧文件仍然可用。"""
+
+    tmp_path = f"{path}.tmp"
+    bloom = BloomFilter.create(tmp_path, capacity, fp_rate)
+    bloom.update(keys)
+    bloom.flush(synced_rowid)
+    bloom.close()
+    os.replace(tmp_path, path)
+    return BloomFilter.open(path)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Pattern
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 通用的跟踪参数，任何站点都去掉。
+TRACKING_PARAMS = frozenset({"from", "spm", "fbclid", "gclid", "mc_cid", "mc_eid", "_hsenc", "_hsmi"})
+TRACKING_PREFIXES = ("utm_",)
+
+
+@dataclass(frozen=True)
+class HostRule:
+    # 路径匹配文章地址模式时文章只由路径决定，整段 query 都可以丢掉；
+    # 其余路径（如 WordPress 的 /?p=123）query 可能就是文章标识，只去跟踪参数。
+    article_path: Optional[Pattern[str]] = None
+    drop_params: FrozenSet[str] = frozenset()
+
+
+# 移动站、镜像域名映射到主域名（www. 前缀已统一去掉）。
+HOST_ALIASES: Dict[str, str] = {
+    "m.36kr.com": "36kr.com",
+    "m.jiqizhixin.com": "jiqizhixin.com",
+    "m.qbitai.com": "qbitai.com",
+    "m.tmtpost.com": "tmtpost.com",
+    "m.infoq.cn": "infoq.cn",
+}
+
+HOST_RULES: Dict[str, HostRule] = {
+    "36kr.com": HostRule(article_path=re.compile(r"/(p|newsflashes)/\d+")),
+    "qbitai.com": HostRule(article_path=re.compile(r"/\d{4}/\d{2}/\d+\.html")),
+    "jiqizhixin.com": HostRule(article_path=re.compile(r"/articles/[\w-]+")),
+    "tmtpost.com": HostRule(article_path=re.compile(r"/\d+\.html")),
+    "infoq.cn": HostRule(drop_params=frozenset({"source", "channel"})),
+}
+
+
+def _keep_param(name: str, rule: HostRule) -> bool:
+    name = name.lower()
+    if name in TRACKING_PARAMS or name in rule.drop_params:
+        return False
+    return not name.startswith(TRACKING_PREFIXES)
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_url(url: str) -> str:
+    """生成用于指纹的规范化地址：统一 https、去掉 www./移动站、跟踪参数、末尾斜杠和锚点。
+
+    结果只用于比较，不用于访问；对结果再次规范化得到相同的值。
+    """
+
+    url = (url or "").strip()
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+        return url
+
+    host = parts.hostname.lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    host = HOST_ALIASES.get(host, host)
+    rule = HOST_RULES.get(host, HostRule())
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+
+    path = parts.path.rstrip("/")
+    query = ""
+    drop_query = rule.article_path is not None and rule.article_path.fullmatch(path) is not None
+    if not drop_query and parts.query:
+        params = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if _keep_param(key, rule)]
+        query = urlencode(sorted(params))
+    # 只保留 "#/..."、"#!..." 这类前端路由，普通锚点指向同一篇文章。
+    fragment = parts.fragment if parts.fragment.startswith(("/", "!")) else ""
+    return urlunsplit(("https", netloc, path, query, fragment))
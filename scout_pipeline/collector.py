@@ -1,16 +1,42 @@
 from __future__ import annotations
 
 import calendar
-from datetime import datetime, timezone
-from typing import List
+import codecs
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, Iterator, List
 from urllib.parse import urljoin
 
 import feedparser
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
+from lxml.cssselect import CSSSelector
 
-from scout_pipeline.config import HTMLSource, RSSSource
+try:
+    import charset_normalizer
+except ImportError:  # pragma: no cover - requests 通常会带上
+    charset_normalizer = None
+
+from scout_pipeline import http_client
+from scout_pipeline.concurrency import HostLimiter
+from scout_pipeline.config import CollectorConfig, HTMLSource, RSSSource
+from scout_pipeline.feed_parser import FeedEntry, FeedParseError, iter_feed_entries
+from scout_pipeline.feed_state import FeedStateStore, FeedValidators, FeedWatermark, body_hash
 from scout_pipeline.models import Item, MediaAsset
+from scout_pipeline.report_store import fingerprint_key
+
+# 连续遇到这么多条已处理的条目才停止解析（旧水位只有一个指纹时遇到即停）。
+WATERMARK_STOP_RUN = 3
+# 每个源记住最近见过的指纹数。
+WATERMARK_RECENT = 50
+# 发布时间早于水位日期减去该窗口的条目才视为已处理。
+WATERMARK_DATE_GRACE = timedelta(hours=24)
+WATERMARK_FUTURE_SKEW = timedelta(hours=1)
 
 
 def _extract_entry_published_at(entry: object) -> str | None:
@@ -26,69 +52,219 @@ def _extract_entry_published_at(entry: object) -> str | None:
     return None
 
 
-def collect_rss(source: RSSSource) -> List[Item]:
-    response = requests.get(
-        str(source.url),
-        timeout=30,
-        headers={
-            "User-Agent": "Mozilla/5.0 (ScoutX/1.0; +https://github.com/)",
-            "Accept": "application/rss+xml,application/atom+xml,application/xml,text/xml,*/*",
-        },
-    )
+@dataclass
+class SourceResult:
+    """单个源的采集结果；校验信息和水位由 collect_sources 在确认采用结果后再落库。"""
+
+    items: List[Item] = field(default_factory=list)
+    validators: FeedValidators | None = None
+    watermark: FeedWatermark | None = None
+
+
+def _fetch_if_changed(
+    source: RSSSource | HTMLSource,
+    headers: dict[str, str],
+    state: FeedStateStore | None,
+) -> tuple[requests.Response | None, FeedValidators | None]:
+    """返回 (response, 新校验信息)；304 或正文 hash 未变时 response 为 None。"""
+
+    url = str(source.url)
+    validators = state.get_validators(source.name, url) if state else None
+    if validators:
+        headers = {**headers, **validators.conditional_headers()}
+    response = http_client.get_session().get(url, timeout=http_client.timeout(), headers=headers)
+    if response.status_code == 304:
+        print(f"[collector] {source.name}: not modified (304)")
+        return None, None
     response.raise_for_status()
-    feed = feedparser.parse(response.content)
+    fresh = FeedValidators.from_response(url, response, body_hash(response.content))
+    if validators and validators.body_hash == fresh.body_hash:
+        print(f"[collector] {source.name}: body unchanged")
+        return None, fresh
+    return response, fresh
+
+
+def collect_rss(
+    source: RSSSource,
+    state: FeedStateStore | None = None,
+    fast_parser: bool = True,
+) -> SourceResult:
+    response, validators = _fetch_if_changed(
+        source,
+        {"Accept": "application/rss+xml,application/atom+xml,application/xml,text/xml,*/*"},
+        state,
+    )
+    if response is None:
+        return SourceResult(validators=validators)
+
+    watermark = state.get_watermark(source.name) if state and source.watermark else None
+    items, newest = parse_rss_items(source, response.content, watermark, fast_parser=fast_parser)
+    return SourceResult(items=items, validators=validators, watermark=newest if source.watermark else None)
+
+
+def parse_rss_items(
+    source: RSSSource,
+    content: bytes,
+    watermark: FeedWatermark | None = None,
+    *,
+    fast_parser: bool = True,
+) -> tuple[List[Item], FeedWatermark | None]:
+    """解析 feed 为 Item，并返回本次看到的最新水位。
+
+    默认走 lxml 流式快速解析，feed 畸形或含不支持的结构时回退到 feedparser。
+    """
+
+    if fast_parser:
+        try:
+            return _build_rss_items(source, iter_feed_entries(content), watermark)
+        except FeedParseError as exc:
+            print(f"[collector] {source.name}: fast parser fallback to feedparser ({exc})")
+    return _build_rss_items(source, _feedparser_entries(source, content), watermark)
+
+
+def _feedparser_entries(source: RSSSource, content: bytes) -> Iterator[FeedEntry]:
+    feed = feedparser.parse(content)
 
     if getattr(feed, "bozo", 0) and not feed.entries:
         raise RuntimeError(f"Invalid RSS feed: {source.name} ({source.url})")
 
-    items: List[Item] = []
     for entry in feed.entries:
-        title = getattr(entry, "title", "").strip()
-        url = getattr(entry, "link", "").strip()
-        description = getattr(entry, "summary", "").strip()
-        if not description and hasattr(entry, "description"):
-            description = str(getattr(entry, "description", "")).strip()
-        comments = []
-        if hasattr(entry, "comments") and entry.comments:
-            comments = [str(entry.comments)]
-
-        media: List[MediaAsset] = []
-        for link in getattr(entry, "links", []):
-            if link.get("rel") == "enclosure" and link.get("href"):
-                media.append(MediaAsset(url=link["href"], media_type=_guess_media_type(link["href"])))
+        description = getattr(entry, "summary", "")
+        if not description.strip() and hasattr(entry, "description"):
+            description = str(getattr(entry, "description", ""))
+        comments = getattr(entry, "comments", None)
+        yield FeedEntry(
+            title=getattr(entry, "title", ""),
+            link=getattr(entry, "link", ""),
+            summary=description,
+            published_at=_extract_entry_published_at(entry),
+            comments=str(comments) if comments else None,
+            enclosures=[
+                link["href"]
+                for link in getattr(entry, "links", [])
+                if link.get("rel") == "enclosure" and link.get("href")
+            ],
+        )
+
 
+def _build_rss_items(
+    source: RSSSource,
+    entries: Iterable[FeedEntry],
+    watermark: FeedWatermark | None,
+) -> tuple[List[Item], FeedWatermark | None]:
+    now = datetime.now(timezone.utc)
+    known = set(watermark.recent) | {watermark.fingerprint} if watermark else set()
+    stop_run = min(WATERMARK_STOP_RUN, len(known))
+    cutoff = _watermark_cutoff(watermark)
+    newest: FeedWatermark | None = None
+    seen: List[str] = []
+    run = 0
+    items: List[Item] = []
+    for entry in entries:
+        title = entry.title.strip()
+        url = entry.link.strip()
         if not title and not url:
             continue
 
+        published_at = entry.published_at
+        published = _parse_published(published_at)
+        fingerprint = fingerprint_key(url, title)
+        seen.append(fingerprint)
+        if newest is None:
+            newest = FeedWatermark(fingerprint=fingerprint)
+        # 明显在未来的日期多半是源站时区写错，不参与水位。
+        if published and published <= now + WATERMARK_FUTURE_SKEW and (
+            not newest.published_at or published_at > newest.published_at
+        ):
+            newest.published_at = published_at
+
+        if fingerprint in known:
+            # 已处理过的条目跳过；连续遇到若干条才认为后面都处理过了。
+            run += 1
+            if run >= stop_run:
+                break
+            continue
+        run = 0
+        if cutoff and published and published < cutoff:
+            break
+
         items.append(
             Item(
                 source=source.name,
                 title=title,
                 url=url,
-                description=description,
-                published_at=_extract_entry_published_at(entry),
-                comments=comments,
-                media=media,
-                raw={"entry": entry},
+                description=entry.summary.strip(),
+                published_at=published_at,
+                comments=[entry.comments] if entry.comments else [],
+                media=[MediaAsset(url=link, media_type=_guess_media_type(link)) for link in entry.enclosures],
             )
         )
-    return items
+    if newest is not None:
+        recent = seen + (watermark.recent if watermark else [])
+        newest.recent = list(dict.fromkeys(recent))[:WATERMARK_RECENT]
+    return items, newest
+
+
+def _parse_published(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _watermark_cutoff(watermark: FeedWatermark | None) -> datetime | None:
+    # 按日期停止只作为兜底：晚发布但日期稍早的条目仍在宽限窗口内。
+    published = _parse_published(watermark.published_at) if watermark else None
+    return published - WATERMARK_DATE_GRACE if published else None
+
+
+_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+_META_SCAN_BYTES = 4096
+_SNIFF_BYTES = 64 * 1024
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+_TEXT_XPATH = etree.XPath("descendant-or-self::text()[not(parent::script or parent::style)]")
 
 
-def _extract_field(soup: BeautifulSoup, selector: str, attr: str | None, multiple: bool) -> str | List[str]:
-    nodes = soup.select(selector)
+@lru_cache(maxsize=256)
+def _compile_selector(selector: str) -> CSSSelector:
+    """CSS 选择器只编译一次为 XPath，按选择器字符串缓存。"""
+
+    return CSSSelector(selector, translator="html")
+
+
+def _node_text(node: etree._Element) -> str:
+    # 与 BeautifulSoup get_text(strip=True) 保持一致：跳过注释、script、style。
+    return "".join(part.strip() for part in _TEXT_XPATH(node))
+
+
+def _extract_field(
+    row: etree._Element,
+    selector: CSSSelector,
+    attr: str | None,
+    multiple: bool,
+) -> str | List[str]:
+    nodes = selector(row)
     if not nodes:
         return [] if multiple else ""
     if multiple:
         values: List[str] = []
         for node in nodes:
             if attr:
-                values.append(node.get(attr, "").strip())
+                values.append((node.get(attr) or "").strip())
             else:
-                values.append(node.get_text(strip=True))
+                values.append(_node_text(node))
         return values
     node = nodes[0]
-    return node.get(attr, "").strip() if attr else node.get_text(strip=True)
+    return (node.get(attr) or "").strip() if attr else _node_text(node)
 
 
 def _guess_media_type(url: str) -> str:
@@ -98,20 +274,79 @@ def _guess_media_type(url: str) -> str:
     return "image"
 
 
-def collect_html(source: HTMLSource) -> List[Item]:
-    response = requests.get(str(source.url), timeout=30)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "lxml")
+def collect_html(source: HTMLSource, state: FeedStateStore | None = None) -> SourceResult:
+    response, validators = _fetch_if_changed(source, {}, state)
+    if response is None:
+        return SourceResult(validators=validators)
+    items = parse_html_items(source, response.content, response.headers.get("Content-Type"))
+    return SourceResult(items=items, validators=validators)
+
+
+def _normalize_encoding(name: str | None) -> str | None:
+    if not name:
+        return None
+    name = name.strip().strip("\"'").lower()
+    # gb2312 / gbk 页面经常混入扩展字符，统一按超集解码。
+    if name in {"gb2312", "gbk", "x-gbk"}:
+        name = "gb18030"
+    try:
+        return codecs.lookup(name).name
+    except LookupError:
+        return None
+
+
+def resolve_html_encoding(content: bytes, content_type: str | None = None) -> str:
+    """按 header、meta、BOM、有限前缀探测的顺序确定编码，避免对整页做编码猜测。"""
+
+    if content_type:
+        match = _CHARSET_RE.search(content_type)
+        encoding = _normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            return encoding
+
+    match = _META_CHARSET_RE.search(content[:_META_SCAN_BYTES])
+    encoding = _normalize_encoding(match.group(1).decode("ascii", "ignore")) if match else None
+    if encoding:
+        return encoding
+
+    for bom, bom_encoding in _BOMS:
+        if content.startswith(bom):
+            return bom_encoding
+
+    prefix = content[:_SNIFF_BYTES]
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    if charset_normalizer is not None:
+        best = charset_normalizer.from_bytes(prefix).best()
+        encoding = _normalize_encoding(best.encoding) if best else None
+        if encoding:
+            return encoding
+    return "utf-8"
+
+
+def parse_html_items(source: HTMLSource, content: bytes, content_type: str | None = None) -> List[Item]:
+    if not content.strip():
+        return []
+    # 直接把原始字节交给 lxml，不生成整页的解码副本。
+    parser = lxml_html.HTMLParser(encoding=resolve_html_encoding(content, content_type))
+    document = lxml_html.document_fromstring(content, parser=parser)
+    list_selector = _compile_selector(source.list_selector)
+    fields = {
+        name: (_compile_selector(field.selector), field.attr, field.multiple)
+        for name, field in source.fields.items()
+    }
+    base_url = str(source.url)
     items: List[Item] = []
 
-    for row in soup.select(source.list_selector):
-        row_soup = BeautifulSoup(str(row), "lxml")
+    for row in list_selector(document):
 
         def get_field(name: str, default: str | list[str] = ""):
-            if name not in source.fields:
+            if name not in fields:
                 return default
-            field = source.fields[name]
-            return _extract_field(row_soup, field.selector, field.attr, field.multiple)
+            return _extract_field(row, *fields[name])
 
         title = get_field("title")
         url = get_field("url")
@@ -130,7 +365,7 @@ def collect_html(source: HTMLSource) -> List[Item]:
         if isinstance(media_urls, str):
             media_urls = [media_urls] if media_urls else []
 
-        url = urljoin(source.url, str(url))
+        url = urljoin(base_url, str(url))
         media = [MediaAsset(url=link, media_type=_guess_media_type(link)) for link in media_urls if link]
 
         items.append(
@@ -142,22 +377,95 @@ def collect_html(source: HTMLSource) -> List[Item]:
                 published_at=None,
                 comments=comments,
                 media=media,
-                raw={"row_html": str(row)},
             )
         )
     return items
 
 
-def collect_sources(sources: List[RSSSource | HTMLSource]) -> List[Item]:
+def _collect_source(
+    source: RSSSource | HTMLSource,
+    state: FeedStateStore | None,
+    config: CollectorConfig,
+) -> SourceResult:
+    if isinstance(source, RSSSource):
+        return collect_rss(source, state, fast_parser=config.fast_rss_parser)
+    return collect_html(source, state)
+
+
+def _collect_limited(
+    source: RSSSource | HTMLSource,
+    limiter: HostLimiter,
+    state: FeedStateStore | None,
+    config: CollectorConfig,
+) -> SourceResult:
+    with limiter.slot(str(source.url)):
+        return _collect_source(source, state, config)
+
+
+def _save_state(state: FeedStateStore | None, source: RSSSource | HTMLSource, result: SourceResult) -> None:
+    if state is None:
+        return
+    if result.watermark:
+        state.save_watermark(source.name, result.watermark)
+    if result.validators:
+        state.save_validators(source.name, result.validators)
+
+
+def collect_sources(
+    sources: List[RSSSource | HTMLSource],
+    config: CollectorConfig | None = None,
+    state: FeedStateStore | None = None,
+) -> List[Item]:
+    config = config or CollectorConfig()
+    if config.max_workers <= 1 or len(sources) <= 1:
+        return _collect_sequential(sources, state, config)
+
+    limiter = HostLimiter(config.per_host_limit)
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=config.max_workers, thread_name_prefix="collector")
+    futures = {executor.submit(_collect_limited, source, limiter, state, config): source for source in sources}
+    try:
+        wait(futures, timeout=config.deadline_s)
+    finally:
+        # 超过 deadline 的源不再等待，也不阻塞本轮后续流程。
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    items: List[Item] = []
+    for future, source in futures.items():
+        if not future.done():
+            print(f"[collector][warn] {source.name} timed out after {config.deadline_s:.0f}s deadline")
+            continue
+        try:
+            result = future.result()
+        except Exception as exc:
+            print(f"[collector][warn] {source.name} failed: {exc}")
+            continue
+        # 只有本轮真正采用的结果才推进校验信息和水位，超时或取消的源下次重新抓。
+        _save_state(state, source, result)
+        items.extend(result.items)
+        print(f"[collector] {source.name}: {len(result.items)} items")
+    print(f"[collector] {len(sources)} sources in {time.monotonic() - started:.1f}s")
+    return items
+
+
+def _collect_sequential(
+    sources: List[RSSSource | HTMLSource],
+    state: FeedStateStore | None,
+    config: CollectorConfig,
+) -> List[Item]:
+    # 单线程时无法中断进行中的请求，只在源之间检查 deadline，超时后剩余的源本轮跳过。
+    started = time.monotonic()
     items: List[Item] = []
     for source in sources:
+        if time.monotonic() - started > config.deadline_s:
+            print(f"[collector][warn] {source.name} skipped after {config.deadline_s:.0f}s deadline")
+            continue
         try:
-            if isinstance(source, RSSSource):
-                source_items = collect_rss(source)
-            else:
-                source_items = collect_html(source)
-            items.extend(source_items)
-            print(f"[collector] {source.name}: {len(source_items)} items")
+            result = _collect_source(source, state, config)
+            _save_state(state, source, result)
+            items.extend(result.items)
+            print(f"[collector] {source.name}: {len(result.items)} items")
         except Exception as exc:
             print(f"[collector][warn] {source.name} failed: {exc}")
+    print(f"[collector] {len(sources)} sources in {time.monotonic() - started:.1f}s")
     return items
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, TypeVar
+from urllib.parse import urlparse
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def host_of(url: str) -> str:
+    return (urlparse(url).netloc or "").lower()
+
+
+class HostLimiter:
+    """按 host 限制并发，避免同一个 RSSHub / CDN 被打满。"""
+
+    def __init__(self, per_host: int) -> None:
+        self.per_host = max(1, per_host)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._semaphores.get(host)
+            if sem is None:
+                sem = threading.BoundedSemaphore(self.per_host)
+                self._semaphores[host] = sem
+            return sem
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[None]:
+        sem = self._semaphore(host_of(url))
+        sem.acquire()
+        try:
+            yield
+        finally:
+            sem.release()
+
+
+def ordered_map(fn: Callable[[T], R], items: Iterable[T], max_workers: int, name: str = "worker") -> Iterator[R]:
+    """并发执行 fn，按输入顺序逐个产出结果，调用方可以边收结果边处理。
+
+    某个结果抛异常时原样抛出，并取消尚未开始的任务。
+    """
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix=name) as executor:
+        futures = [executor.submit(fn, item) for item in items]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
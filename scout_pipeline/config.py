@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, model_validator
 
 
 class FieldSelector(BaseModel):
@@ -15,6 +15,8 @@ class RSSSource(BaseModel):
     type: Literal["rss"]
     name: str
     url: HttpUrl
+    # 按时间倒序的源可以在遇到已处理条目时停止解析；热榜等排序源应关闭。
+    watermark: bool = True
 
 
 class HTMLSource(BaseModel):
@@ -25,10 +27,185 @@ class HTMLSource(BaseModel):
     fields: Dict[str, FieldSelector]
 
 
+class CollectorConfig(BaseModel):
+    max_workers: int = 8
+    per_host_limit: int = 4
+    deadline_s: float = 120.0
+    # lxml 流式解析 RSS/Atom，畸形 feed 自动回退 feedparser。
+    fast_rss_parser: bool = True
+
+
+class HTTPConfig(BaseModel):
+    user_agent: str = "Mozilla/5.0 (ScoutX/1.0; +https://github.com/)"
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    retries: int = 2
+    backoff_factor: float = 0.5
+    pool_connections: int = 16
+    pool_maxsize: int = 8
+    # 按 host 单独指定连接池大小，例如 RSSHub、LLM 接口。
+    host_pool_sizes: Dict[str, int] = {}
+
+
+AI_STRONG_KEYWORDS = [
+    "ai",
+    "aigc",
+    "agi",
+    "llm",
+    "gpt",
+    "openai",
+    "altman",
+    "ilya",
+    "anthropic",
+    "claude",
+    "gemini",
+    "deepseek",
+    "minimax",
+    "kimi",
+    "qwen",
+    "copilot",
+    "cursor",
+    "mcp",
+    "rag",
+    "sora",
+    "人工智能",
+    "大模型",
+    "智能体",
+    "生成式",
+    "机器学习",
+    "深度学习",
+    "多模态",
+    "推理模型",
+    "语言模型",
+    "机器人",
+    "千问",
+    "通义",
+    "智谱",
+    "glm",
+    "豆包",
+    "文心",
+    "混元",
+    "奥特曼",
+]
+
+AI_CONTEXT_KEYWORDS = [
+    "模型",
+    "推理",
+    "训练",
+    "token",
+    "tokens",
+    "agent",
+    "prompt",
+    "embedding",
+    "transformer",
+    "生成",
+    "算力",
+    "算法",
+    "芯片",
+    "gpu",
+    "npu",
+]
+
+
+class RelevanceRule(BaseModel):
+    keyword_class: str
+    field: Literal["title", "description", "text"] = "text"
+    min_hits: int = 1
+    weight: float = 1.0
+
+
+class RelevanceProfile(BaseModel):
+    name: str
+    # 按源名称匹配的 glob（大小写不敏感），为空表示兜底规则。
+    sources: List[str] = []
+    rules: List[RelevanceRule]
+    threshold: float = 1.0
+
+
+def _default_relevance_profiles() -> List[RelevanceProfile]:
+    def rule(keyword_class: str, field: str, min_hits: int = 1) -> RelevanceRule:
+        return RelevanceRule(keyword_class=keyword_class, field=field, min_hits=min_hits)
+
+    return [
+        RelevanceProfile(
+            name="broad",
+            sources=["36kr_*", "infoq*"],
+            rules=[rule("strong", "title"), rule("context", "title", 2)],
+        ),
+        RelevanceProfile(
+            name="ai_focused",
+            sources=["*qbitai*", "*jiqizhixin*", "*agi*", "*infoq*"],
+            rules=[
+                rule("strong", "title"),
+                rule("strong", "text"),
+                rule("context", "title"),
+                rule("context", "text", 2),
+            ],
+        ),
+        RelevanceProfile(
+            name="default",
+            rules=[rule("strong", "title"), rule("strong", "text"), rule("context", "text", 3)],
+        ),
+    ]
+
+
+# filters.allow_keywords / deny_keywords 在匹配器里占用的保留类别名。
+ALLOW_CLASS = "filters.allow"
+DENY_CLASS = "filters.deny"
+
+
+class RelevanceConfig(BaseModel):
+    keyword_classes: Dict[str, List[str]] = {
+        "strong": AI_STRONG_KEYWORDS,
+        "context": AI_CONTEXT_KEYWORDS,
+    }
+    profiles: List[RelevanceProfile] = Field(default_factory=_default_relevance_profiles)
+
+    @model_validator(mode="after")
+    def _check_rule_classes(self) -> "RelevanceConfig":
+        for profile in self.profiles:
+            for rule in profile.rules:
+                if rule.keyword_class not in self.keyword_classes:
+                    raise ValueError(
+                        f"Unknown keyword class in relevance profile {profile.name}: {rule.keyword_class}"
+                    )
+        return self
+
+
 class FilterConfig(BaseModel):
     allow_keywords: List[str] = []
     deny_keywords: List[str] = []
     min_score: float = 7.0
+    relevance: RelevanceConfig = RelevanceConfig()
+
+
+PROMPT_FIELDS = ("title", "description", "comments")
+
+
+class PromptBudgetConfig(BaseModel):
+    # 按 token 预算截断拼进 prompt 的条目字段（url 不截断）。
+    enabled: bool = True
+    # 各字段单独的上限。
+    field_tokens: Dict[str, int] = {"title": 100, "description": 800, "comments": 300}
+    # 所有字段合计上限，超出时按 priority 从后往前继续压缩。
+    max_tokens: int = 1000
+    priority: List[str] = list(PROMPT_FIELDS)
+
+    @model_validator(mode="after")
+    def _check_fields(self) -> "PromptBudgetConfig":
+        for name in [*self.field_tokens, *self.priority]:
+            if name not in PROMPT_FIELDS:
+                raise ValueError(f"Unknown prompt budget field: {name}")
+        return self
+
+
+class LLMCacheConfig(BaseModel):
+    # 以 (api_base, model, temperature, system/user prompt 哈希) 为键的 SQLite 响应缓存。
+    enabled: bool = True
+    ttl_hours: float = 24 * 14
+    max_entries: int = 20000
+    # temperature > 0 时输出本身带随机性，关闭后只缓存 temperature == 0 的调用。
+    cache_nonzero_temperature: bool = True
 
 
 class LLMConfig(BaseModel):
@@ -42,11 +219,86 @@ class LLMConfig(BaseModel):
     filter_user_prompt: str
     creator_system_prompt: str = ""
     creator_user_prompt: str
+    # 并发调用数；每分钟请求数 / token 数为 0 表示不限速。
+    max_concurrency: int = 4
+    requests_per_minute: int = 0
+    tokens_per_minute: int = 0
+    # single: 每条一次请求；batch: 每次请求给 batch_size 条打分，要求 JSON 输出；
+    # combined: 打分和生成 thread 合并成一次请求（长输出不稳定的服务商请用 single/batch）。
+    filter_mode: Literal["single", "batch", "combined"] = "single"
+    batch_size: int = 8
+    cache: LLMCacheConfig = LLMCacheConfig()
+    prompt_budget: PromptBudgetConfig = PromptBudgetConfig()
 
 
 class MediaConfig(BaseModel):
     download_dir: str = "media"
     max_mb: int = 50
+    # 每个条目最多下载的资源数。
+    max_per_item: int = 3
+    # 下载池的全局并发与单 host 并发。
+    max_workers: int = 8
+    per_host_limit: int = 2
+    # 媒体目录总大小上限，超出后按最久未使用淘汰；<= 0 表示不限制。
+    quota_mb: int = 2048
+    # eager: 去重后立即下载全部条目的媒体；accepted: 只下载通过 LLM 筛选的条目；
+    # on_demand: pipeline 不下载，web UI 首次访问时再拉取。
+    download_policy: Literal["eager", "accepted", "on_demand"] = "accepted"
+    # 先用 Range 请求读开头 probe_kb 探测总大小和图片尺寸，再决定是否完整下载；0 关闭探测。
+    probe_kb: int = 16
+    # 小于 min_bytes 或宽/高小于 min_dimension 像素的图片视为追踪像素、表情或图标，直接跳过。
+    min_bytes: int = 1024
+    min_dimension: int = 64
+    # 被判定为小图的 URL 在这段时间内不再请求，过期后重新探测（CDN 占位图、临时错误图）；<= 0 表示永不过期。
+    reject_ttl_hours: int = 168
+    # 已缓存资源超过这么久后带 ETag/Last-Modified 发条件请求复查；<= 0 表示永不复查。
+    revalidate_hours: int = 168
+
+
+class DedupConfig(BaseModel):
+    # 跨源近似去重：SimHash 汉明距离不超过 max_distance 视为同一条内容。
+    near_duplicates: bool = True
+    window_hours: int = 72
+    # 签名按 4 段 16 位建索引，距离超过 3 时无法保证召回。
+    max_distance: int = Field(default=3, ge=0, le=3)
+    max_chars: int = 400
+    # items 表前面的 Bloom filter，默认放在 <sqlite_path>.bloom；容量不足时自动按两倍行数重建。
+    # 页缓存热的情况下 SQLite 主键查询已经很快，主要在库很大、冷启动时有收益，因此默认关闭。
+    bloom_filter: bool = False
+    bloom_path: Optional[str] = None
+    bloom_capacity: int = 1_000_000
+    bloom_fp_rate: float = Field(default=0.001, gt=0, lt=1)
+
+
+class RankingConfig(BaseModel):
+    # LLM 之前的本地粗排：每次运行只把得分最高的条目交给 LLM，其余进持久化队列留给后续运行。
+    enabled: bool = True
+    # <= 0 表示不限制。
+    max_items_per_run: int = 40
+    max_items_per_source: int = 10
+    # 关键词类别（filters.relevance.keyword_classes）每命中一个词的得分，标题命中再乘 title_boost。
+    keyword_weights: Dict[str, float] = {"strong": 3.0, "context": 1.0}
+    title_boost: float = 2.0
+    # 源名称 glob（大小写不敏感）-> 先验加分，取第一个匹配项。
+    source_priors: Dict[str, float] = {}
+    # 新鲜度加分 freshness_weight * 0.5 ** (发布小时数 / half_life)。
+    freshness_weight: float = 2.0
+    freshness_half_life_hours: float = 24
+    # 排队超过这么久仍未轮到的条目直接丢弃。
+    queue_max_age_hours: float = 72
+
+
+class MaintenanceConfig(BaseModel):
+    # 每张表的保留天数，None 表示永久保留。
+    items_ttl_days: Optional[int] = 180
+    reports_ttl_days: Optional[int] = None
+    push_records_ttl_days: Optional[int] = 30
+    maintenance_runs_ttl_days: Optional[int] = 90
+    batch_size: int = 5000
+    # 每次最多归还给文件系统的空闲页数。
+    vacuum_pages: int = 2000
+    # run_once 结束后距上次维护超过该间隔才自动执行，<= 0 表示只手动执行。
+    interval_hours: float = 24
 
 
 class StorageConfig(BaseModel):
@@ -64,8 +316,21 @@ class ScheduleConfig(BaseModel):
 class AppConfig(BaseModel):
     schedule: ScheduleConfig
     sources: List[RSSSource | HTMLSource]
+    collector: CollectorConfig = CollectorConfig()
+    http: HTTPConfig = HTTPConfig()
     filters: FilterConfig
     llm: LLMConfig
     media: MediaConfig
     storage: StorageConfig
+    dedup: DedupConfig = DedupConfig()
+    ranking: RankingConfig = RankingConfig()
+    maintenance: MaintenanceConfig = MaintenanceConfig()
     notifier: NotifierConfig
+
+    @model_validator(mode="after")
+    def _check_ranking_classes(self) -> "AppConfig":
+        classes = set(self.filters.relevance.keyword_classes) | {ALLOW_CLASS, DENY_CLASS}
+        for name in self.ranking.keyword_weights:
+            if name not in classes:
+                raise ValueError(f"Unknown keyword class in ranking.keyword_weights: {name}")
+        return self
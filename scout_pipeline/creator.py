@@ -1,17 +1,72 @@
 from __future__ import annotations
 
+from typing import Optional, Tuple
+
 from scout_pipeline.config import LLMConfig
-from scout_pipeline.models import Item, TweetThread
-from scout_pipeline.analyst import call_llm
+from scout_pipeline.llm_cache import LLMCache
+from scout_pipeline.models import Item, LLMFilterResult, TweetThread
+from scout_pipeline.analyst import as_bool, call_llm, extract_json, filter_item
+from scout_pipeline.prompting import render_prompt
+
+COMBINED_INSTRUCTIONS = """先按上面的标准判断这条内容是否值得推荐并打分；只有值得推荐时，才按用户消息里的要求写 thread。
+只输出 JSON，不要输出其他文字：
+{"passed": true 或 false, "score": 1-10 的数字, "rationale": "一句话理由", "thread": ["第一条推文", "第二条推文"]}
+不推荐时 thread 为空数组。"""
+
+
+def _build_prompt(config: LLMConfig, item: Item) -> str:
+    return render_prompt(config.creator_user_prompt, item, config.prompt_budget)
+
+
+def _split_tweets(text: str) -> TweetThread:
+    return TweetThread(tweets=[t.strip() for t in text.split("\n\n") if t.strip()])
+
+
+def create_thread(config: LLMConfig, item: Item, cache: Optional[LLMCache] = None) -> TweetThread:
+    text = call_llm(config, config.creator_system_prompt, _build_prompt(config, item), cache)
+    return _split_tweets(text)
+
+
+def _parse_combined_response(text: str) -> Optional[Tuple[LLMFilterResult, TweetThread]]:
+    data = extract_json(text)
+    if not isinstance(data, dict):
+        return None
+    passed = as_bool(data.get("passed"))
+    try:
+        score = float(data.get("score"))
+    except (TypeError, ValueError):
+        return None
+    if passed is None:
+        return None
+    thread = data.get("thread") or []
+    if isinstance(thread, str):
+        tweets = _split_tweets(thread)
+    elif isinstance(thread, list):
+        tweets = TweetThread(tweets=[str(t).strip() for t in thread if str(t).strip()])
+    else:
+        return None
+    return LLMFilterResult(passed=passed, score=score, rationale=str(data.get("rationale") or "")), tweets
+
+
+def score_and_create(
+    config: LLMConfig, item: Item, min_score: float, cache: Optional[LLMCache] = None
+) -> Tuple[LLMFilterResult, Optional[TweetThread]]:
+    """一次请求同时打分和生成 thread；分数不够时丢弃 thread。
 
+    回答无法解析或通过了却没给 thread 时，退回两阶段流程。
+    """
 
-def create_thread(config: LLMConfig, item: Item) -> TweetThread:
-    prompt = config.creator_user_prompt.format(
-        title=item.title,
-        url=item.url,
-        description=item.description,
-        comments="\n".join(item.comments),
+    system_prompt = "\n\n".join(
+        part for part in (config.filter_system_prompt, config.creator_system_prompt, COMBINED_INSTRUCTIONS) if part
     )
-    text = call_llm(config, config.creator_system_prompt, prompt)
-    tweets = [t.strip() for t in text.split("\n\n") if t.strip()]
-    return TweetThread(tweets=tweets)
+    parsed = _parse_combined_response(call_llm(config, system_prompt, _build_prompt(config, item), cache))
+    if parsed is None:
+        result = filter_item(config, item, cache)
+        thread = None
+    else:
+        result, thread = parsed
+    if not result.passed or result.score < min_score:
+        return result, None
+    if thread is None or not thread.tweets:
+        thread = create_thread(config, item, cache)
+    return result, thread
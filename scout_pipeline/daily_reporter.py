@@ -4,8 +4,7 @@ import os
 from datetime import date, datetime
 from typing import Any
 
-import requests
-
+from scout_pipeline import http_client
 from scout_pipeline.report_store import fetch_reports
 from scout_pipeline.utils import load_config
 
@@ -77,6 +76,7 @@ def send_daily_report(
 ) -> bool:
     try:
         config = load_config(config_path)
+        http_client.configure(config.http)
         target_date = report_date or date.today().isoformat()
         target_webhook = webhook or (
             str(config.notifier.feishu_webhook) if config.notifier.feishu_webhook else None
@@ -116,11 +116,11 @@ def send_daily_report(
                 },
             }
 
-            resp = requests.post(
+            resp = http_client.get_session().post(
                 target_webhook,
                 json=message_body,
                 headers={"Content-Type": "application/json; charset=utf-8"},
-                timeout=20,
+                timeout=http_client.timeout(20),
             )
             resp.raise_for_status()
             payload = resp.json()
@@ -1,16 +1,25 @@
 from __future__ import annotations
 
-import hashlib
 import sqlite3
-from typing import Iterable, List
+from typing import Dict, Iterable, List, Optional, Set
 
+from scout_pipeline.bloom import BloomFilter, build_bloom_filter
+from scout_pipeline.config import DedupConfig
 from scout_pipeline.models import Item
+from scout_pipeline.report_store import fingerprint_item
+
+# 单条 IN 查询的参数个数，低于旧版 SQLite 的 999 变量上限。
+LOOKUP_CHUNK_SIZE = 500
 
 
 class Deduper:
-    def __init__(self, sqlite_path: str) -> None:
+    def __init__(self, sqlite_path: str, config: Optional[DedupConfig] = None) -> None:
         self.sqlite_path = sqlite_path
+        self.config = config
         self._init_db()
+        self.bloom: Optional[BloomFilter] = None
+        if config is not None and config.bloom_filter:
+            self.bloom = self._load_bloom()
 
     def _init_db(self) -> None:
         with sqlite3.connect(self.sqlite_path) as conn:
@@ -24,22 +33,98 @@ class Deduper:
                 )
                 """
             )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_items_created_at ON items (created_at)")
+
+    @property
+    def bloom_path(self) -> str:
+        if self.config is not None and self.config.bloom_path:
+            return self.config.bloom_path
+        return f"{self.sqlite_path}.bloom"
+
+    @staticmethod
+    def _max_rowid(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM items").fetchone()[0]
+
+    def _load_bloom(self) -> BloomFilter:
+        assert self.config is not None
+        try:
+            bloom: Optional[BloomFilter] = BloomFilter.open(self.bloom_path)
+        except (OSError, ValueError):
+            bloom = None
+        if bloom is not None:
+            with sqlite3.connect(self.sqlite_path) as conn:
+                max_rowid = self._max_rowid(conn)
+            # 有未经过 Bloom filter 写入的行、已超容量或配置变了，都要重建。
+            stale = (
+                bloom.synced_rowid < max_rowid
+                or bloom.saturated
+                or bloom.capacity < self.config.bloom_capacity
+                or bloom.fp_rate != self.config.bloom_fp_rate
+            )
+            if not stale:
+                return bloom
+            bloom.close()
+        return self.rebuild_bloom()
+
+    def rebuild_bloom(self) -> BloomFilter:
+        """用 items 表全部指纹重建 Bloom filter，容量取配置值与两倍行数中的较大者。"""
+
+        config = self.config or DedupConfig()
+        with sqlite3.connect(self.sqlite_path) as conn:
+            max_rowid = self._max_rowid(conn)
+            rows = conn.execute("SELECT COUNT(1) FROM items").fetchone()[0]
+            bloom = build_bloom_filter(
+                self.bloom_path,
+                (row[0] for row in conn.execute("SELECT id FROM items")),
+                capacity=max(config.bloom_capacity, rows * 2),
+                fp_rate=config.bloom_fp_rate,
+                synced_rowid=max_rowid,
+            )
+        if self.bloom is not None:
+            self.bloom.close()
+        self.bloom = bloom
+        print(f"[deduper] bloom filter rebuilt: rows={rows} capacity={bloom.capacity} path={self.bloom_path}")
+        return bloom
+
+    def close(self) -> None:
+        if self.bloom is not None:
+            self.bloom.close()
+            self.bloom = None
 
     def _fingerprint(self, item: Item) -> str:
-        key = (item.url or item.title).encode("utf-8")
-        return hashlib.md5(key).hexdigest()
+        return fingerprint_item(item)
+
+    def _existing(self, conn: sqlite3.Connection, fingerprints: List[str]) -> Set[str]:
+        existing: Set[str] = set()
+        for start in range(0, len(fingerprints), LOOKUP_CHUNK_SIZE):
+            chunk = fingerprints[start : start + LOOKUP_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(f"SELECT id FROM items WHERE id IN ({placeholders})", chunk)
+            existing.update(row[0] for row in rows)
+        return existing
 
     def filter_new(self, items: Iterable[Item]) -> List[Item]:
-        new_items: List[Item] = []
+        # 同一批次内按指纹去重，保留首次出现的条目。
+        batch: Dict[str, Item] = {}
+        for item in items:
+            batch.setdefault(self._fingerprint(item), item)
+        if not batch:
+            return []
+
+        bloom = self.bloom
+        # Bloom filter 判定不存在的指纹一定是新的，只有“可能存在”的才回查 SQLite。
+        maybe_seen = [fp for fp in batch if fp in bloom] if bloom is not None else list(batch)
         with sqlite3.connect(self.sqlite_path) as conn:
-            for item in items:
-                fp = self._fingerprint(item)
-                cur = conn.execute("SELECT 1 FROM items WHERE id=?", (fp,))
-                if cur.fetchone():
-                    continue
-                conn.execute(
-                    "INSERT INTO items (id, url, title) VALUES (?, ?, ?)",
-                    (fp, item.url, item.title),
-                )
-                new_items.append(item)
-        return new_items
+            existing = self._existing(conn, maybe_seen)
+            new_rows = [(fp, item) for fp, item in batch.items() if fp not in existing]
+            if bloom is not None and new_rows:
+                # 先写 Bloom filter 再提交 SQLite，保证它始终是 items 的超集。
+                bloom.update(fp for fp, _ in new_rows)
+                bloom.flush()
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (id, url, title) VALUES (?, ?, ?)",
+                [(fp, item.url, item.title) for fp, item in new_rows],
+            )
+            if bloom is not None:
+                bloom.flush(self._max_rowid(conn))
+        return [item for _, item in new_rows]
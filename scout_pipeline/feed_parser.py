@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import calendar
+import html
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional
+
+from feedparser.datetimes import _parse_date
+from lxml import etree
+
+ATOM_NS = "http://www.w3.org/2005/Atom"
+RSS1_NS = "http://purl.org/rss/1.0/"
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+CONTENT_NS = "http://purl.org/rss/1.0/modules/content/"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+DCTERMS_NS = "http://purl.org/dc/terms/"
+XML_BASE = "{http://www.w3.org/XML/1998/namespace}base"
+
+_ENTRY_TAGS = {"item", f"{{{RSS1_NS}}}item", f"{{{ATOM_NS}}}entry"}
+_HTML_LINK_TYPES = {"", "text/html", "application/xhtml+xml"}
+
+_DROP_BLOCK_RE = re.compile(r"<(script|style|applet)\b[^>]*>.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_IMG_TAG_RE = re.compile(r"<img\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>", re.IGNORECASE)
+_SRC_ATTR_RE = re.compile(r"\ssrc\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))", re.IGNORECASE)
+
+
+class FeedParseError(ValueError):
+    """快速解析器无法处理的 feed，调用方应回退到 feedparser。"""
+
+
+@dataclass
+class FeedEntry:
+    title: str
+    link: str
+    summary: str
+    published_at: Optional[str] = None
+    comments: Optional[str] = None
+    enclosures: List[str] = field(default_factory=list)
+
+
+def _to_iso(value: str | None) -> str | None:
+    if not value:
+        return None
+    # 复用 feedparser 的日期解析，保证与回退路径得到相同的 published_at。
+    parsed = _parse_date(value.strip())
+    if not parsed:
+        return None
+    try:
+        return datetime.fromtimestamp(calendar.timegm(parsed), tz=timezone.utc).isoformat()
+    except Exception:
+        return None
+
+
+def _clean_html(text: str) -> str:
+    """只做下游会感知到的 feedparser 清洗：去掉 script/style，规范化 img src。"""
+
+    if "<" not in text:
+        return text
+    text = _DROP_BLOCK_RE.sub("", text)
+
+    def _rewrite_img(match: re.Match[str]) -> str:
+        src = _SRC_ATTR_RE.search(match.group(0))
+        if not src:
+            return "<img />"
+        value = html.unescape(next(group for group in src.groups() if group is not None))
+        return '<img src="' + html.escape(value, quote=True).replace("&#x27;", "'") + '" />'
+
+    return _IMG_TAG_RE.sub(_rewrite_img, text)
+
+
+def _text(elem: etree._Element | None) -> str:
+    if elem is None:
+        return ""
+    if len(elem):
+        # 内嵌 XHTML 等结构交给 feedparser。
+        raise FeedParseError("inline markup in text element")
+    return elem.text or ""
+
+
+def _check_base(elem: etree._Element) -> None:
+    if elem.get(XML_BASE) is not None:
+        raise FeedParseError("xml:base is not supported by the fast path")
+
+
+def _parse_rss_item(item: etree._Element, ns: str) -> FeedEntry:
+    def find(tag: str, namespace: str = ns) -> etree._Element | None:
+        return item.find(f"{{{namespace}}}{tag}" if namespace else tag)
+
+    link = _text(find("link")).strip()
+    guid = find("guid")
+    if not link and guid is not None and guid.get("isPermaLink", "true").lower() != "false":
+        link = _text(guid).strip()
+
+    summary = _text(find("description"))
+    if not summary.strip():
+        summary = _text(find("encoded", CONTENT_NS))
+
+    published = (
+        _to_iso(_text(find("pubDate")))
+        or _to_iso(_text(find("issued", DCTERMS_NS)))
+        or _to_iso(_text(find("date", DC_NS)))
+        or _to_iso(_text(find("modified", DCTERMS_NS)))
+        or _to_iso(_text(find("created", DCTERMS_NS)))
+    )
+    enclosures = [
+        enclosure.get("url", "")
+        for enclosure in item.iterfind(f"{{{ns}}}enclosure" if ns else "enclosure")
+        if enclosure.get("url")
+    ]
+    return FeedEntry(
+        title=_text(find("title")),
+        link=link,
+        summary=_clean_html(summary),
+        published_at=published,
+        comments=_text(find("comments")) or None,
+        enclosures=enclosures,
+    )
+
+
+def _parse_atom_entry(entry: etree._Element) -> FeedEntry:
+    _check_base(entry)
+
+    def find(tag: str) -> etree._Element | None:
+        elem = entry.find(f"{{{ATOM_NS}}}{tag}")
+        if elem is not None and elem.get("type") == "xhtml":
+            raise FeedParseError("xhtml content is not supported by the fast path")
+        return elem
+
+    link = ""
+    enclosures: List[str] = []
+    for elem in entry.iterfind(f"{{{ATOM_NS}}}link"):
+        href = elem.get("href") or ""
+        rel = elem.get("rel") or "alternate"
+        if rel == "enclosure" and href:
+            enclosures.append(href)
+        elif rel == "alternate" and not link and (elem.get("type") or "") in _HTML_LINK_TYPES:
+            link = href
+
+    summary = _text(find("summary"))
+    if not summary.strip():
+        summary = _text(find("content"))
+
+    published = (
+        _to_iso(_text(find("published")))
+        or _to_iso(_text(find("issued")))
+        or _to_iso(_text(find("updated")))
+        or _to_iso(_text(find("modified")))
+        or _to_iso(_text(find("created")))
+    )
+    return FeedEntry(
+        title=_text(find("title")),
+        link=link,
+        summary=_clean_html(summary),
+        published_at=published,
+        enclosures=enclosures,
+    )
+
+
+def iter_feed_entries(content: bytes) -> Iterator[FeedEntry]:
+    """用 iterparse 流式解析 RSS 2.0 / RSS 1.0 / Atom，只提取 ScoutX 用到的字段。
+
+    遇到畸形或不支持的 feed 抛出 FeedParseError；调用方可以随时停止迭代，
+    剩余部分不会再被解析。
+    """
+
+    root_tag: str | None = None
+    parser = etree.iterparse(
+        io.BytesIO(content),
+        events=("start", "end"),
+        resolve_entities=False,
+        no_network=True,
+    )
+    try:
+        for event, elem in parser:
+            if root_tag is None:
+                root_tag = elem.tag
+                if root_tag not in ("rss", f"{{{RDF_NS}}}RDF", f"{{{ATOM_NS}}}feed"):
+                    raise FeedParseError(f"unsupported feed root: {root_tag}")
+                _check_base(elem)
+                continue
+            if event != "end" or elem.tag not in _ENTRY_TAGS:
+                continue
+
+            if elem.tag == f"{{{ATOM_NS}}}entry":
+                entry = _parse_atom_entry(elem)
+            else:
+                entry = _parse_rss_item(elem, RSS1_NS if elem.tag.startswith("{") else "")
+
+            # 释放已处理条目，保持内存占用与单个条目同量级。
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+            yield entry
+    except etree.XMLSyntaxError as exc:
+        raise FeedParseError(str(exc)) from exc
+    if root_tag is None:
+        raise FeedParseError("empty document")
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import requests
+
+
+@dataclass
+class FeedValidators:
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    body_hash: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    @classmethod
+    def from_response(cls, url: str, response: requests.Response, digest: str) -> "FeedValidators":
+        return cls(
+            url=url,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            body_hash=digest,
+        )
+
+
+@dataclass
+class FeedWatermark:
+    fingerprint: str
+    published_at: Optional[str] = None
+    # 最近几轮在 feed 里见过的指纹（新的在前），用于判断是否连续遇到已处理条目。
+    recent: List[str] = field(default_factory=list)
+
+
+def body_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class FeedStateStore:
+    """按源记录 HTTP 校验信息和已处理水位，用于条件请求、跳过未变内容和提前停止解析。"""
+
+    def __init__(self, sqlite_path: str) -> None:
+        self.sqlite_path = sqlite_path
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS feed_validators (
+                    source TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    body_hash TEXT,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS feed_watermarks (
+                    source TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    published_at TEXT,
+                    recent_json TEXT,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(feed_watermarks)")}
+            if "recent_json" not in columns:
+                conn.execute("ALTER TABLE feed_watermarks ADD COLUMN recent_json TEXT")
+
+    def get_validators(self, source: str, url: str) -> Optional[FeedValidators]:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute(
+                "SELECT url, etag, last_modified, body_hash FROM feed_validators WHERE source=?",
+                (source,),
+            ).fetchone()
+        # 源地址改了就当作没有缓存。
+        if not row or row[0] != url:
+            return None
+        return FeedValidators(url=row[0], etag=row[1], last_modified=row[2], body_hash=row[3])
+
+    def save_validators(self, source: str, validators: FeedValidators) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO feed_validators (source, url, etag, last_modified, body_hash, updated_at)
+                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(source) DO UPDATE SET
+                    url=excluded.url,
+                    etag=excluded.etag,
+                    last_modified=excluded.last_modified,
+                    body_hash=excluded.body_hash,
+                    updated_at=CURRENT_TIMESTAMP
+                """,
+                (
+                    source,
+                    validators.url,
+                    validators.etag,
+                    validators.last_modified,
+                    validators.body_hash,
+                ),
+            )
+
+    def get_watermark(self, source: str) -> Optional[FeedWatermark]:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute(
+                "SELECT fingerprint, published_at, recent_json FROM feed_watermarks WHERE source=?",
+                (source,),
+            ).fetchone()
+        if not row:
+            return None
+        return FeedWatermark(fingerprint=row[0], published_at=row[1], recent=json.loads(row[2] or "[]"))
+
+    def save_watermark(self, source: str, watermark: FeedWatermark) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO feed_watermarks (source, fingerprint, published_at, recent_json, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(source) DO UPDATE SET
+                    fingerprint=excluded.fingerprint,
+                    published_at=excluded.published_at,
+                    recent_json=excluded.recent_json,
+                    updated_at=CURRENT_TIMESTAMP
+                """,
+                (source, watermark.fingerprint, watermark.published_at, json.dumps(watermark.recent)),
+            )
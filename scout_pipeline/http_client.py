@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from scout_pipeline.config import HTTPConfig
+
+# 服务端给的 Retry-After 过长时也只等这么久，避免单次 cron 被拖住。
+MAX_RETRY_AFTER = 120.0
+
+_lock = threading.Lock()
+_session: Optional[requests.Session] = None
+_config: HTTPConfig = HTTPConfig()
+
+
+class _CappedRetry(Retry):
+    """Retry-After 最多等 MAX_RETRY_AFTER 秒，避免一个源把采集线程挂住几个小时。"""
+
+    def get_retry_after(self, response) -> Optional[float]:
+        seconds = super().get_retry_after(response)
+        return None if seconds is None else min(seconds, MAX_RETRY_AFTER)
+
+
+def _build_adapter(config: HTTPConfig, pool_maxsize: int) -> HTTPAdapter:
+    # 只对幂等请求做连接层重试；LLM / 飞书的 POST 由调用方的 tenacity 负责。
+    retry = _CappedRetry(
+        total=config.retries,
+        backoff_factor=config.backoff_factor,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=config.pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+
+
+def _build_session(config: HTTPConfig) -> requests.Session:
+    session = requests.Session()
+    session.headers["User-Agent"] = config.user_agent
+    default_adapter = _build_adapter(config, config.pool_maxsize)
+    session.mount("http://", default_adapter)
+    session.mount("https://", default_adapter)
+    for host, size in config.host_pool_sizes.items():
+        adapter = _build_adapter(config, size)
+        session.mount(f"http://{host}", adapter)
+        session.mount(f"https://{host}", adapter)
+    return session
+
+
+def configure(config: HTTPConfig) -> None:
+    """按配置重建共享 Session；配置未变化时保留已有连接池。"""
+
+    global _session, _config
+    with _lock:
+        if _session is not None and config == _config:
+            return
+        if _session is not None:
+            _session.close()
+        _config = config
+        _session = _build_session(config)
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            _session = _build_session(_config)
+        return _session
+
+
+def timeout(read: float | None = None) -> Tuple[float, float]:
+    return (_config.connect_timeout, read if read is not None else _config.read_timeout)
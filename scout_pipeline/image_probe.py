@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import struct
+from typing import Optional, Tuple
+
+# JPEG 里携带尺寸的 SOF 段（排除 DHT/JPG/DAC 这几个同区间的标记）。
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            pos += 2
+            continue
+        length = struct.unpack(">H", data[pos + 2 : pos + 4])[0]
+        if marker in _JPEG_SOF:
+            if pos + 9 > len(data):
+                return None
+            height, width = struct.unpack(">HH", data[pos + 5 : pos + 9])
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def _webp_size(data: bytes) -> Optional[Tuple[int, int]]:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        bits = int.from_bytes(data[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = int.from_bytes(data[24:27], "little") + 1
+        height = int.from_bytes(data[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def image_size(data: bytes) -> Optional[Tuple[str, int, int]]:
+    """从文件开头几 KB 识别格式和像素尺寸，返回 (format, width, height)；识别不了返回 None。"""
+
+    size: Optional[Tuple[int, int]] = None
+    if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
+        fmt, size = "png", struct.unpack(">II", data[16:24])
+    elif data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        fmt, size = "gif", struct.unpack("<HH", data[6:10])
+    elif data.startswith(b"\xff\xd8"):
+        fmt, size = "jpeg", _jpeg_size(data)
+    elif data.startswith(b"RIFF") and data[8:12] == b"WEBP":
+        fmt, size = "webp", _webp_size(data)
+    elif data.startswith(b"BM") and len(data) >= 26:
+        width, height = struct.unpack("<ii", data[18:26])
+        fmt, size = "bmp", (width, abs(height))
+    else:
+        return None
+    if size is None:
+        return None
+    return fmt, size[0], size[1]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Tuple
+
+
+class KeywordMatcher:
+    """多类关键词匹配器，按配置编译一次，一次扫描得到每类命中的关键词数。
+
+    语义与逐个 ``keyword.lower() in text.lower()`` 相同：同一关键词多次出现只算一次，
+    互相包含的关键词（如 ``ai`` / ``openai``）都会计数。
+
+    扫描由一个按长度降序排列的大 alternation 正则在 C 层完成。命中某个关键词时，
+    预先算好的“被包含关键词”集合一并计入；只有可能与后续关键词部分重叠的位置
+    （如 ``人工智能`` 与 ``智能体``）才额外做一次锚定匹配，因此结果与 Aho-Corasick
+    的全部重叠匹配等价。
+    """
+
+    def __init__(self, classes: Mapping[str, Iterable[str]]) -> None:
+        self.classes: Tuple[str, ...] = tuple(classes)
+        keyword_classes: Dict[str, set[int]] = {}
+        for class_idx, name in enumerate(self.classes):
+            for keyword in classes[name]:
+                keyword_classes.setdefault(keyword.lower(), set()).add(class_idx)
+
+        # 空字符串在 `in` 语义下总是命中。
+        self._always = [0] * len(self.classes)
+        for class_idx in keyword_classes.pop("", set()):
+            self._always[class_idx] += 1
+
+        self.keywords: List[str] = sorted(keyword_classes, key=len, reverse=True)
+        self._keyword_classes: Dict[str, Tuple[int, ...]] = {
+            keyword: tuple(sorted(keyword_classes[keyword])) for keyword in self.keywords
+        }
+        self._pattern = re.compile("|".join(re.escape(keyword) for keyword in self.keywords)) if self.keywords else None
+        self._implied: Dict[str, FrozenSet[str]] = {
+            keyword: frozenset(other for other in self.keywords if other in keyword) for keyword in self.keywords
+        }
+        self._overlap_offsets: Dict[str, Tuple[int, ...]] = {
+            keyword: self._partial_overlaps(keyword) for keyword in self.keywords
+        }
+        # 关键词都不含空白时，"标题 + 空格 + 正文" 的命中等于两段命中的并集。
+        self.splits_on_whitespace = not any(re.search(r"\s", keyword) for keyword in self.keywords)
+
+    def _partial_overlaps(self, keyword: str) -> Tuple[int, ...]:
+        offsets = []
+        for offset in range(1, len(keyword)):
+            tail = keyword[offset:]
+            if any(other.startswith(tail) and len(other) > len(tail) for other in self.keywords):
+                offsets.append(offset)
+        return tuple(offsets)
+
+    def hit_keywords(self, text: str) -> set[str]:
+        hits: set[str] = set()
+        if self._pattern is None or not text:
+            return hits
+        text = text.lower()
+        pattern = self._pattern
+        implied = self._implied
+        overlap_offsets = self._overlap_offsets
+        for match in pattern.finditer(text):
+            keyword = match.group()
+            # 已命中的关键词，其包含的子关键词也已计入。
+            if keyword not in hits:
+                hits |= implied[keyword]
+            offsets = overlap_offsets[keyword]
+            if offsets:
+                start = match.start()
+                for offset in offsets:
+                    inner = pattern.match(text, start + offset)
+                    if inner and inner.group() not in hits:
+                        hits |= implied[inner.group()]
+        return hits
+
+    def count_vector(self, hits: Iterable[str]) -> List[int]:
+        """按 ``self.classes`` 的顺序返回每类命中的不同关键词数。"""
+
+        counts = list(self._always)
+        keyword_classes = self._keyword_classes
+        for keyword in hits:
+            for class_idx in keyword_classes[keyword]:
+                counts[class_idx] += 1
+        return counts
+
+    def count(self, hits: Iterable[str]) -> Dict[str, int]:
+        """把命中的关键词集合换算成 {类别: 命中的不同关键词数}。"""
+
+        return dict(zip(self.classes, self.count_vector(hits)))
+
+    def group(self, hits: Iterable[str]) -> Dict[str, List[str]]:
+        """把命中的关键词集合按类别分组，用于调试输出。"""
+
+        groups: Dict[str, List[str]] = {name: [] for name in self.classes}
+        for keyword in sorted(hits):
+            for class_idx in self._keyword_classes[keyword]:
+                groups[self.classes[class_idx]].append(keyword)
+        return groups
+
+    def scan(self, text: str) -> Dict[str, int]:
+        return self.count(self.hit_keywords(text))
+
+    def field_hits(self, title: str, description: str) -> Dict[str, set[str]]:
+        """返回 title / description / text（标题+正文）三个字段命中的关键词，每段文本只扫描一遍。"""
+
+        title_hits = self.hit_keywords(title)
+        description_hits = self.hit_keywords(description)
+        if self.splits_on_whitespace:
+            text_hits = title_hits | description_hits
+        else:
+            text_hits = self.hit_keywords(f"{title} {description}")
+        return {"title": title_hits, "description": description_hits, "text": text_hits}
+
+    def scan_fields(self, title: str, description: str) -> Dict[str, Dict[str, int]]:
+        return {name: self.count(hits) for name, hits in self.field_hits(title, description).items()}
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+from scout_pipeline.config import LLMCacheConfig, LLMConfig
+
+
+def prompt_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """持久化的 LLM 响应缓存，命中时不再请求接口。
+
+    键为 (api_base, model, temperature, system prompt 哈希, user prompt 哈希)；
+    过期条目查询时忽略，prune() 删除过期条目并按最近使用时间裁剪到 max_entries。
+    """
+
+    def __init__(self, sqlite_path: str, config: LLMCacheConfig) -> None:
+        self.sqlite_path = sqlite_path
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    api_base TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    temperature REAL NOT NULL,
+                    system_hash TEXT NOT NULL,
+                    user_hash TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (api_base, model, temperature, system_hash, user_hash)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache (last_used_at)")
+
+    def applies(self, config: LLMConfig) -> bool:
+        return self.config.enabled and (config.temperature == 0 or self.config.cache_nonzero_temperature)
+
+    @staticmethod
+    def _key(config: LLMConfig, system_prompt: str, user_prompt: str) -> Tuple[str, str, float, str, str]:
+        return (
+            str(config.api_base),
+            config.model,
+            float(config.temperature),
+            prompt_hash(system_prompt),
+            prompt_hash(user_prompt),
+        )
+
+    def get(self, config: LLMConfig, system_prompt: str, user_prompt: str) -> Optional[str]:
+        key = self._key(config, system_prompt, user_prompt)
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute(
+                """
+                SELECT response FROM llm_cache
+                WHERE api_base=? AND model=? AND temperature=? AND system_hash=? AND user_hash=?
+                  AND created_at > datetime('now', ?)
+                """,
+                (*key, f"-{self.config.ttl_hours} hours"),
+            ).fetchone()
+            if row:
+                conn.execute(
+                    """
+                    UPDATE llm_cache SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP
+                    WHERE api_base=? AND model=? AND temperature=? AND system_hash=? AND user_hash=?
+                    """,
+                    key,
+                )
+        with self._lock:
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return row[0] if row else None
+
+    def put(self, config: LLMConfig, system_prompt: str, user_prompt: str, response: str) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO llm_cache
+                    (api_base, model, temperature, system_hash, user_hash, response)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (*self._key(config, system_prompt, user_prompt), response),
+            )
+        with self._lock:
+            self.stores += 1
+
+    def prune(self) -> Dict[str, int]:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            expired = conn.execute(
+                "DELETE FROM llm_cache WHERE created_at <= datetime('now', ?)",
+                (f"-{self.config.ttl_hours} hours",),
+            ).rowcount
+            overflow = conn.execute(
+                """
+                DELETE FROM llm_cache WHERE rowid IN (
+                    SELECT rowid FROM llm_cache ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (max(self.config.max_entries, 0),),
+            ).rowcount
+        return {"expired": expired, "evicted": overflow}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "stores": self.stores}
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from scout_pipeline.config import MaintenanceConfig
+from scout_pipeline.ranking import LLMQueue
+from scout_pipeline.report_store import fingerprint_key
+
+# 以指纹为主键、同时保存 url/title 的表：(表名, 指纹列)。
+_FINGERPRINTED_TABLES: List[Tuple[str, str]] = [
+    ("items", "id"),
+    ("reports", "id"),
+    ("neardup_index", "item_id"),
+    ("llm_queue", "fingerprint"),
+]
+
+# 只引用指纹、自身没有 url/title 的表：(表名, 指纹列)，通过旧指纹 -> 新指纹的映射改写。
+_FINGERPRINT_REFERENCES: List[Tuple[str, str]] = [
+    ("push_records", "item_id"),
+    ("pending_alternates", "report_id"),
+]
+
+
+# 按时间列做 TTL 删除的表：(表名, 时间列, MaintenanceConfig 中的 TTL 字段)。
+_TTL_TABLES: List[Tuple[str, str, str]] = [
+    ("items", "created_at", "items_ttl_days"),
+    ("reports", "created_at", "reports_ttl_days"),
+    ("push_records", "pushed_at", "push_records_ttl_days"),
+    ("maintenance_runs", "finished_at", "maintenance_runs_ttl_days"),
+]
+
+# (索引名, 表名, 列)。
+_INDEXES: List[Tuple[str, str, str]] = [
+    ("idx_reports_date_created", "reports", "report_date, created_at"),
+    ("idx_push_records_pushed_at", "push_records", "pushed_at"),
+    ("idx_items_created_at", "items", "created_at"),
+]
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _table_exists(conn: sqlite3.Connection, table: str) -> bool:
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+    return row is not None
+
+
+def migrate_fingerprints(sqlite_path: str, batch_size: int = 5000) -> Dict[str, int]:
+    """按当前 fingerprint_key（含 URL 规范化）重算已有记录的指纹。
+
+    规范化后指向同一篇文章的多行只保留一行（已是新指纹的行优先，其次是最早写入的行）；
+    push_records、pending_alternates 只保存指纹，通过旧指纹 -> 新指纹的映射一并改写。可重复执行，已是新指纹的行不会变动；
+    规范化规则调整后需要重新执行一次，但之前按旧规则合并删掉的行无法恢复。
+    """
+
+    stats: Dict[str, int] = {}
+    with sqlite3.connect(sqlite_path) as conn:
+        has_queue = _table_exists(conn, "llm_queue")
+    if has_queue:
+        # 旧版 llm_queue 没有 url/title 列，先补齐。
+        LLMQueue(sqlite_path)
+    with sqlite3.connect(sqlite_path) as conn:
+        tables = [(table, column) for table, column in _FINGERPRINTED_TABLES if _table_exists(conn, table)]
+        conn.execute("CREATE TEMP TABLE fingerprint_map (old TEXT PRIMARY KEY, new TEXT NOT NULL)")
+        for table, column in tables:
+            cur = conn.execute(f"SELECT {column}, url, title FROM {table}")
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                conn.executemany(
+                    "INSERT OR IGNORE INTO fingerprint_map (old, new) VALUES (?, ?)",
+                    [
+                        (old, new)
+                        for old, url, title in rows
+                        if (new := fingerprint_key(url, title)) != old
+                    ],
+                )
+        stats["remapped"] = conn.execute("SELECT COUNT(1) FROM fingerprint_map").fetchone()[0]
+
+        for table, column in tables:
+            # 按 rowid 顺序改写，撞上已有新指纹的行保持原样，随后作为重复删除。
+            cur = conn.execute(
+                f"""
+                UPDATE OR IGNORE {table}
+                SET {column} = (SELECT new FROM fingerprint_map WHERE old = {table}.{column})
+                WHERE {column} IN (SELECT old FROM fingerprint_map)
+                """
+            )
+            stats[table] = cur.rowcount
+            cur = conn.execute(f"DELETE FROM {table} WHERE {column} IN (SELECT old FROM fingerprint_map)")
+            stats[f"{table}_merged"] = cur.rowcount
+
+        for table, column in _FINGERPRINT_REFERENCES:
+            if not _table_exists(conn, table):
+                continue
+            cur = conn.execute(
+                f"""
+                UPDATE OR IGNORE {table}
+                SET {column} = (SELECT new FROM fingerprint_map WHERE old = {table}.{column})
+                WHERE {column} IN (SELECT old FROM fingerprint_map)
+                """
+            )
+            stats[table] = cur.rowcount
+            cur = conn.execute(f"DELETE FROM {table} WHERE {column} IN (SELECT old FROM fingerprint_map)")
+            stats[f"{table}_merged"] = cur.rowcount
+        conn.execute("DROP TABLE fingerprint_map")
+    return stats
+
+
+def _init_runs_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            started_at DATETIME NOT NULL,
+            finished_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            details_json TEXT NOT NULL
+        )
+        """
+    )
+
+
+def ensure_indexes(conn: sqlite3.Connection) -> List[str]:
+    """补建缺失的索引，返回本次新建的索引名。"""
+
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    created = []
+    for name, table, columns in _INDEXES:
+        if name in existing or not _table_exists(conn, table):
+            continue
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+        created.append(name)
+    conn.commit()
+    return created
+
+
+def purge_expired(conn: sqlite3.Connection, table: str, column: str, ttl_days: int, batch_size: int) -> int:
+    """分批删除超过 TTL 的行，每批单独提交，避免长时间持有写锁。"""
+
+    deleted = 0
+    while True:
+        cur = conn.execute(
+            f"""
+            DELETE FROM {table} WHERE rowid IN (
+                SELECT rowid FROM {table} WHERE {column} < datetime('now', ?) LIMIT ?
+            )
+            """,
+            (f"-{ttl_days} days", batch_size),
+        )
+        conn.commit()
+        deleted += cur.rowcount
+        if cur.rowcount < batch_size:
+            return deleted
+
+
+def incremental_vacuum(conn: sqlite3.Connection, pages: int) -> Dict[str, int]:
+    """归还空闲页。库还不是 INCREMENTAL 模式时先做一次全量 VACUUM 完成切换。"""
+
+    stats = {"converted": 0}
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != _AUTO_VACUUM_INCREMENTAL:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        stats["converted"] = 1
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # execute() 只单步执行一次（只释放一页），executescript 会跑完整条 PRAGMA。
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    stats["freed_pages"] = before - after
+    stats["free_pages"] = after
+    stats["page_count"] = conn.execute("PRAGMA page_count").fetchone()[0]
+    return stats
+
+
+def run_maintenance(sqlite_path: str, config: MaintenanceConfig) -> Dict[str, Any]:
+    """按配置清理过期数据、补建索引并回收空间，结果写入 maintenance_runs。"""
+
+    started_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    details: Dict[str, Any] = {"deleted": {}}
+    conn = sqlite3.connect(sqlite_path)
+    try:
+        _init_runs_table(conn)
+        details["indexes_created"] = ensure_indexes(conn)
+        for table, column, ttl_field in _TTL_TABLES:
+            ttl_days: Optional[int] = getattr(config, ttl_field)
+            if ttl_days is None or not _table_exists(conn, table):
+                continue
+            details["deleted"][table] = purge_expired(conn, table, column, ttl_days, config.batch_size)
+        details["vacuum"] = incremental_vacuum(conn, config.vacuum_pages)
+        conn.execute(
+            "INSERT INTO maintenance_runs (started_at, details_json) VALUES (?, ?)",
+            (started_at, json.dumps(details, ensure_ascii=False)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return details
+
+
+def maintenance_due(sqlite_path: str, config: MaintenanceConfig) -> bool:
+    if config.interval_hours <= 0:
+        return False
+    with sqlite3.connect(sqlite_path) as conn:
+        _init_runs_table(conn)
+        row = conn.execute(
+            "SELECT 1 FROM maintenance_runs WHERE finished_at >= datetime('now', ?) LIMIT 1",
+            (f"-{config.interval_hours} hours",),
+        ).fetchone()
+    return row is None
+
+
+def list_maintenance_runs(sqlite_path: str, limit: int = 10) -> List[Dict[str, Any]]:
+    with sqlite3.connect(sqlite_path) as conn:
+        _init_runs_table(conn)
+        rows = conn.execute(
+            "SELECT started_at, finished_at, details_json FROM maintenance_runs ORDER BY id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    return [
+        {"started_at": row[0], "finished_at": row[1], "details": json.loads(row[2])}
+        for row in rows
+    ]
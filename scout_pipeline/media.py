@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import hashlib
 import os
-from typing import List
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import closing
+from typing import Dict, Iterable, Iterator, List, Optional
 from urllib.parse import urlparse
 
-import requests
-
+from scout_pipeline import http_client
+from scout_pipeline.concurrency import HostLimiter
 from scout_pipeline.config import MediaConfig
+from scout_pipeline.image_probe import image_size
+from scout_pipeline.media_store import MediaStore
 from scout_pipeline.models import Item, MediaAsset
 
 
@@ -16,40 +22,294 @@ def _safe_filename(url: str) -> str:
     return name.split("?")[0]
 
 
-def download_media(config: MediaConfig, item: Item) -> Item:
+def _total_size(response) -> Optional[int]:
+    """206 响应从 Content-Range 取完整大小，200 响应取 Content-Length；未知时返回 None。"""
+
+    if response.status_code == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else None
+
+
+def _read_head(chunks: Iterator[bytes], size: int) -> bytes:
+    head = bytearray()
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= size:
+            break
+    return bytes(head)
+
+
+def _tiny_reason(config: MediaConfig, media: MediaAsset, head: bytes, total: Optional[int]) -> Optional[str]:
+    if total is not None and total < config.min_bytes:
+        return f"bytes={total}"
+    if media.media_type != "image":
+        return None
+    info = image_size(head)
+    if info and min(info[1], info[2]) < config.min_dimension:
+        return f"{info[0]} {info[1]}x{info[2]}"
+    return None
+
+
+class _TooLarge(RuntimeError):
+    pass
+
+
+def _append(handle, digest, chunks: Iterable[bytes], downloaded: int, max_bytes: int) -> int:
+    for chunk in chunks:
+        if chunk:
+            downloaded += len(chunk)
+            if downloaded > max_bytes:
+                raise _TooLarge("media exceeds max_mb")
+            digest.update(chunk)
+            handle.write(chunk)
+    return downloaded
+
+
+def _validator(response) -> Optional[str]:
+    """If-Range 只能用强 ETag 或 Last-Modified。"""
+
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _hash_file(path: str):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest
+
+
+def download_asset(config: MediaConfig, media: MediaAsset, store: Optional[MediaStore] = None) -> None:
+    """下载单个资源，成功时写入 media.local_path；失败静默跳过。
+
+    传入 store 时按内容哈希落盘，已下载过的 URL 直接复用本地文件，过期后用 ETag 条件请求复查；
+    中断的下载保留 .part 文件，下次用 Range + If-Range 从断点续传。
+    """
+
+    if store is None:
+        _fetch(config, media, None)
+        return
+    # .part 文件按 URL 命名，同一 URL 同时只能有一个下载。
+    with store.url_lock(media.url):
+        _fetch(config, media, store)
+
+
+def _fetch(config: MediaConfig, media: MediaAsset, store: Optional[MediaStore]) -> None:
+    cached: Optional[str] = None
+    conditional: Dict[str, str] = {}
+    resume = None
+    if store is not None:
+        cached = store.lookup(media.url)
+        if cached:
+            conditional = store.revalidation_headers(media.url)
+            if not conditional:
+                media.local_path = cached
+                return
+        elif store.is_rejected(media.url):
+            return
+        else:
+            resume = store.partial(media.url)
+
+    max_bytes = config.max_mb * 1024 * 1024
+    probe_bytes = max(config.probe_kb, 0) * 1024
+    session = http_client.get_session()
+    tmp_path: str | None = None
+    # 网络中断时保留 .part 文件等下次续传；被判定为小图或超限时才删除。
+    keep_partial = False
+    try:
+        offset = resume["size"] if resume else 0
+        if offset:
+            headers = {"Range": f"bytes={offset}-", "If-Range": str(resume["validator"])}
+        else:
+            # 先用 Range 请求开头 probe_kb：能拿到完整大小和图片尺寸，小图/超大文件在完整传输前丢弃；
+            # 服务端不支持 Range 时同一个响应边读边判断，不额外发请求。
+            headers = {"Range": f"bytes=0-{probe_bytes - 1}"} if probe_bytes else {}
+            headers.update(conditional)
+        with closing(
+            session.get(media.url, timeout=http_client.timeout(20), stream=True, headers=headers)
+        ) as response:
+            if response.status_code == 304 and cached and store is not None:
+                store.touch_url(media.url)
+                media.local_path = cached
+                return
+            if offset and response.status_code == 416:
+                # 断点已在文件末尾之后（文件变短或上次写完未入库），丢弃重下。
+                tmp_path = str(resume["path"])
+                return
+            response.raise_for_status()
+            total = _total_size(response)
+            if total is not None and total > max_bytes:
+                tmp_path = str(resume["path"]) if resume else None
+                return
+            validator = _validator(response)
+            chunks = response.iter_content(chunk_size=8192)
+            resumed = bool(offset) and response.status_code == 206
+
+            if store is not None:
+                tmp_path = store.partial_path(media.url)
+                os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+                if resumed:
+                    digest = _hash_file(tmp_path)
+                    downloaded = offset
+                    handle = open(tmp_path, "ab")
+                else:
+                    handle = open(tmp_path, "wb")
+                if validator:
+                    store.save_partial(media.url, tmp_path, validator, total)
+                    keep_partial = True
+            else:
+                # 并发下载时先写临时文件再原子替换，避免同名文件写到一半被另一个线程覆盖。
+                fd, tmp_path = tempfile.mkstemp(dir=config.download_dir, suffix=".part")
+                handle = os.fdopen(fd, "wb")
+
+            with handle:
+                if resumed:
+                    downloaded = _append(handle, digest, chunks, downloaded, max_bytes)
+                else:
+                    head = _read_head(chunks, probe_bytes or 8192)
+                    reason = _tiny_reason(config, media, head, total)
+                    if reason:
+                        keep_partial = False
+                        if store is not None:
+                            store.reject(media.url, reason)
+                        return
+                    digest = hashlib.sha256()
+                    downloaded = _append(handle, digest, [head], 0, max_bytes)
+                    if response.status_code != 206:
+                        downloaded = _append(handle, digest, chunks, downloaded, max_bytes)
+                    elif len(head) >= probe_bytes and (total is None or downloaded < total):
+                        # 探测段之后的部分用第二个 Range 请求续上，开头不重复下载。
+                        rest_headers = {"Range": f"bytes={downloaded}-"}
+                        if validator:
+                            rest_headers["If-Range"] = validator
+                        with closing(
+                            session.get(
+                                media.url, timeout=http_client.timeout(20), stream=True, headers=rest_headers
+                            )
+                        ) as rest:
+                            # 416 说明文件恰好在探测段内结束。
+                            if rest.status_code != 416:
+                                rest.raise_for_status()
+                                if rest.status_code != 206:
+                                    handle.seek(0)
+                                    handle.truncate()
+                                    digest = hashlib.sha256()
+                                    downloaded = 0
+                                downloaded = _append(
+                                    handle, digest, rest.iter_content(chunk_size=8192), downloaded, max_bytes
+                                )
+            content_type = response.headers.get("Content-Type")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        keep_partial = False
+        if downloaded < config.min_bytes:
+            if store is not None:
+                store.reject(media.url, f"bytes={downloaded}")
+            return
+        if store is not None:
+            local_path = store.put(
+                media.url, tmp_path, digest.hexdigest(), downloaded, content_type, etag, last_modified
+            )
+        else:
+            local_path = os.path.join(config.download_dir, _safe_filename(media.url))
+            os.replace(tmp_path, local_path)
+        tmp_path = None
+        media.local_path = local_path
+    except _TooLarge:
+        keep_partial = False
+    except Exception:
+        pass
+    finally:
+        if tmp_path and not keep_partial:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if store is not None:
+                store.drop_partial(media.url)
+        if cached and not media.local_path:
+            # 复查失败时继续用旧副本。
+            media.local_path = cached
+
+
+def download_media(config: MediaConfig, item: Item, store: Optional[MediaStore] = None) -> Item:
     if config.max_mb <= 0:
         return item
 
     os.makedirs(config.download_dir, exist_ok=True)
-    max_bytes = config.max_mb * 1024 * 1024
-
     # 避免一个条目包含大量图片时卡住整个 pipeline。
-    for media in item.media[:3]:
-        local_path: str | None = None
-        try:
-            response = requests.get(media.url, timeout=(5, 20), stream=True)
-            response.raise_for_status()
-
-            content_length = int(response.headers.get("Content-Length", "0") or 0)
-            if content_length and content_length > max_bytes:
-                continue
-            filename = _safe_filename(media.url)
-            local_path = os.path.join(config.download_dir, filename)
-            with open(local_path, "wb") as handle:
-                downloaded = 0
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        downloaded += len(chunk)
-                        if downloaded > max_bytes:
-                            raise RuntimeError("media exceeds max_mb")
-                        handle.write(chunk)
-            media.local_path = local_path
-        except Exception:
-            if local_path:
-                try:
-                    if os.path.exists(local_path):
-                        os.remove(local_path)
-                except Exception:
-                    pass
-            continue
+    for media in item.media[: config.max_per_item]:
+        download_asset(config, media, store)
     return item
+
+
+class MediaDownloader:
+    """后台媒体下载池：全局并发由线程数限制，单个 host 的并发由 HostLimiter 限制。
+
+    submit() 立即返回，run_once 只在需要落库前对该条目调用 wait()。
+    """
+
+    def __init__(self, config: MediaConfig, store: Optional[MediaStore] = None) -> None:
+        self.config = config
+        self.store = store
+        self.enabled = config.max_mb > 0
+        self._limiter = HostLimiter(config.per_host_limit)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, config.max_workers), thread_name_prefix="media")
+        self._pending: Dict[int, List[Future]] = {}
+        if self.enabled:
+            os.makedirs(config.download_dir, exist_ok=True)
+
+    def __enter__(self) -> "MediaDownloader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _download(self, media: MediaAsset) -> None:
+        with self._limiter.slot(media.url):
+            download_asset(self.config, media, self.store)
+
+    def submit(self, item: Item) -> None:
+        if not self.enabled:
+            return
+        self._pending[id(item)] = [
+            self._executor.submit(self._download, media) for media in item.media[: self.config.max_per_item]
+        ]
+
+    def wait(self, item: Item) -> Item:
+        futures = self._pending.pop(id(item), [])
+        if futures:
+            wait(futures)
+        return item
+
+    def discard(self, item: Item) -> None:
+        """条目被丢弃时取消尚未开始的下载，已开始的让它自然结束。"""
+
+        for future in self._pending.pop(id(item), []):
+            future.cancel()
+
+    def close(self) -> None:
+        for futures in self._pending.values():
+            for future in futures:
+                future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+
+
+def fetch_on_demand(config: MediaConfig, store: MediaStore, url: str) -> Optional[str]:
+    """on_demand 策略下由 web UI 在首次需要资源时调用，返回本地路径并回写到报告。"""
+
+    if config.max_mb <= 0:
+        return None
+    os.makedirs(config.download_dir, exist_ok=True)
+    media = MediaAsset(url=url, media_type="image")
+    download_asset(config, media, store)
+    if media.local_path:
+        store.link_reports(url, media.local_path)
+    return media.local_path
@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from scout_pipeline.config import MediaConfig
+
+_KNOWN_EXTENSIONS = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".webp",
+    ".avif",
+    ".svg",
+    ".bmp",
+    ".mp4",
+    ".webm",
+    ".mov",
+}
+# 超出配额时一次淘汰到配额的 90%，避免每次运行都在边界上反复淘汰。
+_EVICT_TARGET = 0.9
+# 超过这么久没有续上的 .part 文件在淘汰时清理。
+_PARTIAL_TTL_DAYS = 7
+
+
+def _extension(url: str, content_type: Optional[str]) -> str:
+    ext = os.path.splitext(urlparse(url).path)[1].lower()
+    if ext in _KNOWN_EXTENSIONS:
+        return ext
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if guessed:
+            return ".jpg" if guessed == ".jpe" else guessed
+    return ""
+
+
+class MediaStore:
+    """按 SHA-256 内容寻址的媒体目录（两级分片），SQLite 里记录 URL -> 内容哈希和 LRU 使用时间。
+
+    相同内容只存一份；已知 URL 不再重复下载；总大小超过 quota_mb 时按最久未使用淘汰，
+    并把 reports.media_json 里指向被淘汰文件的 local_path 置空。
+    """
+
+    def __init__(self, config: MediaConfig, sqlite_path: str) -> None:
+        self.config = config
+        self.root = config.download_dir
+        self.sqlite_path = sqlite_path
+        # URL -> [锁, 持有/等待的线程数]；没人用时删除，不会随 URL 数增长。
+        self._locks: Dict[str, list] = {}
+        self._locks_guard = threading.Lock()
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media_assets (
+                    sha256 TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    content_type TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    last_used_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media_urls (
+                    url TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    fetched_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media_rejects (
+                    url TEXT PRIMARY KEY,
+                    reason TEXT NOT NULL,
+                    checked_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS media_partials (
+                    url TEXT PRIMARY KEY,
+                    path TEXT NOT NULL,
+                    validator TEXT NOT NULL,
+                    total INTEGER,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(media_urls)")}
+            if "etag" not in columns:
+                conn.execute("ALTER TABLE media_urls ADD COLUMN etag TEXT")
+            if "last_modified" not in columns:
+                conn.execute("ALTER TABLE media_urls ADD COLUMN last_modified TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_media_assets_last_used ON media_assets (last_used_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_media_urls_sha256 ON media_urls (sha256)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_media_rejects_checked_at ON media_rejects (checked_at)")
+
+    def path_for(self, digest: str, extension: str = "") -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}{extension}")
+
+    @contextmanager
+    def url_lock(self, url: str) -> Iterator[None]:
+        """同一 URL 的下载串行化（续传文件和 media_partials 行按 URL 区分），不同 URL 互不等待。"""
+
+        with self._locks_guard:
+            entry = self._locks.setdefault(url, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[url]
+
+    def partial_path(self, url: str) -> str:
+        return os.path.join(self.root, ".partial", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".part")
+
+    def partial(self, url: str) -> Optional[Dict[str, object]]:
+        """上次中断留下的 .part 文件及其校验值（强 ETag 或 Last-Modified），用于 If-Range 续传。"""
+
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute(
+                "SELECT path, validator, total FROM media_partials WHERE url=?", (url,)
+            ).fetchone()
+        if not row or not os.path.exists(row[0]):
+            return None
+        return {"path": row[0], "validator": row[1], "total": row[2], "size": os.path.getsize(row[0])}
+
+    def save_partial(self, url: str, path: str, validator: str, total: Optional[int]) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO media_partials (url, path, validator, total)
+                VALUES (?, ?, ?, ?)
+                """,
+                (url, path, validator, total),
+            )
+
+    def drop_partial(self, url: str) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute("DELETE FROM media_partials WHERE url=?", (url,))
+
+    def revalidation_headers(self, url: str) -> Dict[str, str]:
+        """缓存超过 revalidate_hours 且有 ETag/Last-Modified 时返回条件请求头，否则返回空字典。"""
+
+        if self.config.revalidate_hours <= 0:
+            return {}
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute(
+                """
+                SELECT etag, last_modified FROM media_urls
+                WHERE url = ? AND fetched_at <= datetime('now', ?)
+                """,
+                (url, f"-{self.config.revalidate_hours} hours"),
+            ).fetchone()
+        headers: Dict[str, str] = {}
+        if row and row[0]:
+            headers["If-None-Match"] = row[0]
+        if row and row[1]:
+            headers["If-Modified-Since"] = row[1]
+        return headers
+
+    def touch_url(self, url: str) -> None:
+        """条件请求返回 304 后刷新校验时间。"""
+
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute("UPDATE media_urls SET fetched_at=CURRENT_TIMESTAMP WHERE url=?", (url,))
+
+    def lookup(self, url: str) -> Optional[str]:
+        """已下载过的 URL 直接返回本地路径，并刷新 LRU 时间；文件丢失时清掉索引。"""
+
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute(
+                """
+                SELECT a.sha256, a.path FROM media_urls u
+                JOIN media_assets a ON a.sha256 = u.sha256
+                WHERE u.url = ?
+                """,
+                (url,),
+            ).fetchone()
+            if not row:
+                return None
+            digest, path = row
+            if not os.path.exists(path):
+                conn.execute("DELETE FROM media_urls WHERE sha256=?", (digest,))
+                conn.execute("DELETE FROM media_assets WHERE sha256=?", (digest,))
+                return None
+            conn.execute("UPDATE media_assets SET last_used_at=CURRENT_TIMESTAMP WHERE sha256=?", (digest,))
+        return path
+
+    def _reject_window(self) -> str:
+        return f"-{self.config.reject_ttl_hours} hours"
+
+    def is_rejected(self, url: str) -> bool:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            if self.config.reject_ttl_hours <= 0:
+                row = conn.execute("SELECT 1 FROM media_rejects WHERE url=?", (url,)).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT 1 FROM media_rejects WHERE url=? AND checked_at >= datetime('now', ?)",
+                    (url, self._reject_window()),
+                ).fetchone()
+        return row is not None
+
+    def reject(self, url: str, reason: str) -> None:
+        """记录探测后判定为追踪像素/图标的 URL，reject_ttl_hours 内不再请求。"""
+
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO media_rejects (url, reason) VALUES (?, ?)",
+                (url, reason),
+            )
+
+    def put(
+        self,
+        url: str,
+        tmp_path: str,
+        digest: str,
+        size: int,
+        content_type: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> str:
+        """把已下载完的临时文件移入内容寻址目录，返回最终路径；相同内容只保留一份。"""
+
+        with sqlite3.connect(self.sqlite_path) as conn:
+            row = conn.execute("SELECT path FROM media_assets WHERE sha256=?", (digest,)).fetchone()
+            if row and os.path.exists(row[0]):
+                path = row[0]
+                os.remove(tmp_path)
+                conn.execute("UPDATE media_assets SET last_used_at=CURRENT_TIMESTAMP WHERE sha256=?", (digest,))
+            else:
+                path = self.path_for(digest, _extension(url, content_type))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO media_assets (sha256, path, size, content_type)
+                    VALUES (?, ?, ?, ?)
+                    """,
+                    (digest, path, size, content_type),
+                )
+            conn.execute(
+                """
+                INSERT INTO media_urls (url, sha256, etag, last_modified) VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    sha256=excluded.sha256,
+                    etag=excluded.etag,
+                    last_modified=excluded.last_modified,
+                    fetched_at=CURRENT_TIMESTAMP
+                """,
+                (url, digest, etag, last_modified),
+            )
+            conn.execute("DELETE FROM media_partials WHERE url=?", (url,))
+        return path
+
+    def total_bytes(self) -> int:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM media_assets").fetchone()[0]
+
+    def evict(self) -> Dict[str, int]:
+        """超过配额时按 last_used_at 从旧到新淘汰，返回淘汰的文件数和字节数。"""
+
+        stats = {"evicted": 0, "freed_bytes": 0}
+        self._purge_partials()
+        self._purge_rejects()
+        if self.config.quota_mb <= 0:
+            return stats
+        quota = self.config.quota_mb * 1024 * 1024
+        with sqlite3.connect(self.sqlite_path) as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM media_assets").fetchone()[0]
+            if total <= quota:
+                return stats
+            target = int(quota * _EVICT_TARGET)
+            victims: List[Tuple[str, str, int]] = []
+            for digest, path, size in conn.execute(
+                "SELECT sha256, path, size FROM media_assets ORDER BY last_used_at ASC, created_at ASC"
+            ):
+                if total <= target:
+                    break
+                victims.append((digest, path, size))
+                total -= size
+
+            for digest, path, size in victims:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM media_urls WHERE sha256=?", (digest,))
+                conn.execute("DELETE FROM media_assets WHERE sha256=?", (digest,))
+                stats["evicted"] += 1
+                stats["freed_bytes"] += size
+            self._clear_report_paths(conn, {path for _, path, _ in victims})
+        return stats
+
+    def _purge_rejects(self) -> None:
+        if self.config.reject_ttl_hours <= 0:
+            return
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute("DELETE FROM media_rejects WHERE checked_at < datetime('now', ?)", (self._reject_window(),))
+
+    def _purge_partials(self) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            rows = conn.execute(
+                "SELECT url, path FROM media_partials WHERE updated_at < datetime('now', ?)",
+                (f"-{_PARTIAL_TTL_DAYS} days",),
+            ).fetchall()
+            for url, path in rows:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                conn.execute("DELETE FROM media_partials WHERE url=?", (url,))
+
+    def link_reports(self, url: str, path: str) -> None:
+        """按需下载完成后，把 reports.media_json 里该 URL 尚为空的 local_path 补上。"""
+
+        with sqlite3.connect(self.sqlite_path) as conn:
+            self._rewrite_report_media(
+                conn, url, lambda entry: entry.get("url") == url and not entry.get("local_path"), path
+            )
+
+    def referenced(self, url: str) -> bool:
+        """URL 是否出现在某条报告的 media_json 里；按需下载只服务这些 URL。"""
+
+        with sqlite3.connect(self.sqlite_path) as conn:
+            if not self._has_reports(conn):
+                return False
+            for (media_json,) in conn.execute(
+                "SELECT media_json FROM reports WHERE media_json LIKE ?", (f"%{url}%",)
+            ):
+                if any(entry.get("url") == url for entry in json.loads(media_json or "[]")):
+                    return True
+        return False
+
+    @staticmethod
+    def _has_reports(conn: sqlite3.Connection) -> bool:
+        row = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='reports'").fetchone()
+        return row is not None
+
+    def _clear_report_paths(self, conn: sqlite3.Connection, paths: set[str]) -> None:
+        if not paths:
+            return
+        # 一次扫描所有带本地路径的报告，而不是每个被淘汰的文件各扫一遍。
+        self._rewrite_report_media(conn, '"local_path": "', lambda entry: entry.get("local_path") in paths, None)
+
+    def _rewrite_report_media(
+        self,
+        conn: sqlite3.Connection,
+        needle: str,
+        match: Callable[[dict], bool],
+        local_path: Optional[str],
+    ) -> None:
+        if not self._has_reports(conn):
+            return
+        # LIKE 先粗筛，再解析 JSON 精确匹配；改写结果在同一事务里批量写回。
+        updates: List[Tuple[str, str]] = []
+        for report_id, media_json in conn.execute(
+            "SELECT id, media_json FROM reports WHERE media_json LIKE ?", (f"%{needle}%",)
+        ):
+            media = json.loads(media_json) if media_json else []
+            changed = False
+            for entry in media:
+                if match(entry):
+                    entry["local_path"] = local_path
+                    changed = True
+            if changed:
+                updates.append((json.dumps(media, ensure_ascii=False), report_id))
+        conn.executemany("UPDATE reports SET media_json=? WHERE id=?", updates)
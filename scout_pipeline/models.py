@@ -11,6 +11,13 @@ class MediaAsset:
     local_path: Optional[str] = None
 
 
+@dataclass
+class AlternateSource:
+    source: str
+    url: str
+    title: str
+
+
 @dataclass
 class Item:
     source: str
@@ -20,6 +27,7 @@ class Item:
     published_at: Optional[str] = None
     comments: List[str] = field(default_factory=list)
     media: List[MediaAsset] = field(default_factory=list)
+    alternates: List[AlternateSource] = field(default_factory=list)
     raw: dict = field(default_factory=dict)
 
 
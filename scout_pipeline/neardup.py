@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from scout_pipeline.config import DedupConfig
+from scout_pipeline.models import AlternateSource, Item
+from scout_pipeline.report_store import fingerprint_item
+
+SIMHASH_BITS = 64
+BAND_BITS = 16
+BANDS = SIMHASH_BITS // BAND_BITS
+BAND_MASK = (1 << BAND_BITS) - 1
+# 特征太少时 SimHash 不可靠（短标题很容易互相“相似”），这类条目不参与近似去重。
+MIN_FEATURES = 8
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]")
+
+
+def text_features(title: str, description: str, max_chars: int = 400) -> Counter[str]:
+    """标题 + 正文前 max_chars 个字符的相邻词对；中文按单字切分，英文按单词切分。"""
+
+    tokens = _TOKEN_RE.findall(f"{title} {description[:max_chars]}".lower())
+    return Counter(f"{left} {right}" for left, right in zip(tokens, tokens[1:]))
+
+
+# 把每一位展开到 24 位宽的“通道”里，一次大整数乘加就能累加 64 个位上的权重。
+_LANE_BITS = 24
+_LANE_MASK = (1 << _LANE_BITS) - 1
+_BYTE_SPREAD = [sum(1 << (_LANE_BITS * bit) for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+_BYTE_SHIFTS = [_LANE_BITS * 8 * idx for idx in range(8)]
+
+
+def simhash(features: Counter[str]) -> int:
+    lanes = 0
+    total = 0
+    for feature, weight in features.items():
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        spread = 0
+        # digest 按大端解释，最后一个字节是最低 8 位。
+        for shift, byte in zip(_BYTE_SHIFTS, reversed(digest)):
+            spread |= _BYTE_SPREAD[byte] << shift
+        lanes += weight * spread
+        total += weight
+    # 某一位上置 1 的权重超过总权重一半时，签名该位为 1。
+    return sum(
+        1 << bit for bit in range(SIMHASH_BITS) if 2 * (lanes >> (_LANE_BITS * bit) & _LANE_MASK) > total
+    )
+
+
+def hamming(left: int, right: int) -> int:
+    return (left ^ right).bit_count()
+
+
+def bands(value: int) -> Tuple[int, ...]:
+    """把签名切成 4 段 16 位；汉明距离 <= 3 时至少有一段完全相同。"""
+
+    return tuple(value >> (band * BAND_BITS) & BAND_MASK for band in range(BANDS))
+
+
+def _to_sqlite(value: int) -> int:
+    # SQLite INTEGER 是有符号 64 位。
+    return value - (1 << SIMHASH_BITS) if value >= 1 << (SIMHASH_BITS - 1) else value
+
+
+def _from_sqlite(value: int) -> int:
+    return value + (1 << SIMHASH_BITS) if value < 0 else value
+
+
+@dataclass
+class CollapseResult:
+    items: List[Item]
+    # 与历史条目重复的新条目：(历史条目指纹, 来源信息)；历史条目可能还在 LLM 队列里未入库。
+    attached: List[Tuple[str, AlternateSource]] = field(default_factory=list)
+
+    @property
+    def collapsed(self) -> int:
+        return len(self.attached) + sum(len(item.alternates) for item in self.items)
+
+
+class NearDuplicateIndex:
+    """基于 SimHash + 分段 LSH 的跨源近似去重，索引保存在 SQLite，只保留 window_hours 内的条目。"""
+
+    def __init__(self, sqlite_path: str, config: DedupConfig) -> None:
+        self.sqlite_path = sqlite_path
+        self.config = config
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS neardup_index (
+                    item_id TEXT PRIMARY KEY,
+                    simhash INTEGER NOT NULL,
+                    band0 INTEGER NOT NULL,
+                    band1 INTEGER NOT NULL,
+                    band2 INTEGER NOT NULL,
+                    band3 INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    seen_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            for band in range(BANDS):
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_neardup_band{band} ON neardup_index (band{band})"
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_neardup_seen_at ON neardup_index (seen_at)")
+
+    def signature(self, item: Item) -> Optional[int]:
+        features = text_features(item.title, item.description, self.config.max_chars)
+        if len(features) < MIN_FEATURES:
+            return None
+        return simhash(features)
+
+    def _window(self) -> str:
+        return f"-{self.config.window_hours} hours"
+
+    @staticmethod
+    def _live_filter(conn: sqlite3.Connection) -> str:
+        # 只有已入库（reports）或仍在 LLM 队列里等待的历史条目才能作为归属对象；
+        # 被 LLM 拒掉的条目不吞掉后来的相似条目，让它们自己再走一遍流程。
+        tables = {
+            row[0]
+            for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('reports', 'llm_queue')"
+            )
+        }
+        clauses = []
+        if "reports" in tables:
+            clauses.append("item_id IN (SELECT id FROM reports)")
+        if "llm_queue" in tables:
+            clauses.append("item_id IN (SELECT fingerprint FROM llm_queue)")
+        return f"({' OR '.join(clauses)})" if clauses else "0"
+
+    def _lookup(self, conn: sqlite3.Connection, value: int, live: str) -> Optional[str]:
+        rows = conn.execute(
+            f"""
+            SELECT item_id, simhash FROM neardup_index
+            WHERE (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?)
+              AND seen_at >= datetime('now', ?)
+              AND {live}
+            """,
+            (*bands(value), self._window()),
+        )
+        for item_id, stored in rows:
+            if hamming(value, _from_sqlite(stored)) <= self.config.max_distance:
+                return item_id
+        return None
+
+    def collapse(self, items: List[Item]) -> CollapseResult:
+        """把近似重复的条目合并到首次出现的条目上，重复项记为其 alternates。
+
+        与窗口内已入库或仍在排队的历史条目重复的新条目不再返回，只在结果中记录它们归属的历史条目；
+        归属条目尚未入库时由 attach_alternates 暂存，等它入库时再挂上。
+        """
+
+        result = CollapseResult(items=[])
+        batch_bands: Dict[Tuple[int, int], List[Tuple[int, Item]]] = {}
+        new_rows = []
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute("DELETE FROM neardup_index WHERE seen_at < datetime('now', ?)", (self._window(),))
+            live = self._live_filter(conn)
+            for item in items:
+                value = self.signature(item)
+                if value is None:
+                    result.items.append(item)
+                    continue
+                alternate = AlternateSource(source=item.source, url=item.url, title=item.title)
+
+                canonical = next(
+                    (
+                        other
+                        for key in enumerate(bands(value))
+                        for other_value, other in batch_bands.get(key, ())
+                        if hamming(value, other_value) <= self.config.max_distance
+                    ),
+                    None,
+                )
+                if canonical is not None:
+                    canonical.alternates.append(alternate)
+                    continue
+
+                existing_id = self._lookup(conn, value, live)
+                if existing_id is not None:
+                    result.attached.append((existing_id, alternate))
+                    continue
+
+                for key in enumerate(bands(value)):
+                    batch_bands.setdefault(key, []).append((value, item))
+                new_rows.append(
+                    (fingerprint_item(item), _to_sqlite(value), *bands(value), item.source, item.url, item.title)
+                )
+                result.items.append(item)
+
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO neardup_index (
+                    item_id, simhash, band0, band1, band2, band3, source, url, title
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                new_rows,
+            )
+        return result
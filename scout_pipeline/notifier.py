@@ -4,10 +4,10 @@ from collections import defaultdict
 from datetime import date, datetime, timedelta, timezone
 from typing import Iterable
 
-import requests
 from requests import exceptions as requests_exceptions
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
+from scout_pipeline import http_client
 from scout_pipeline.models import Item, TweetThread
 from scout_pipeline.report_store import filter_unpushed_items, mark_items_pushed
 
@@ -62,11 +62,11 @@ def _post_feishu_card(webhook: str, title: str, elements: list[dict]) -> None:
         },
     }
 
-    resp = requests.post(
+    resp = http_client.get_session().post(
         webhook,
         json=body,
         headers={"Content-Type": "application/json; charset=utf-8"},
-        timeout=(5, 20),
+        timeout=http_client.timeout(20),
     )
     resp.raise_for_status()
     data = resp.json()
@@ -191,7 +191,12 @@ def notify_feishu_daily(
                     "content": (
                         f"**[{item.title}]({item.url})**\n"
                         f"- 来源：{item.source}\n"
-                        f"- 发布时间：{published_text}\n"
+                        + (
+                            "- 另见：" + "、".join(f"[{alt.source}]({alt.url})" for alt in item.alternates) + "\n"
+                            if item.alternates
+                            else ""
+                        )
+                        + f"- 发布时间：{published_text}\n"
                         + (f"{body_text}" if body_text else "")
                     ),
                 }
@@ -2,140 +2,40 @@ from __future__ import annotations
 
 import os
 from datetime import datetime, timedelta, timezone
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
-from scout_pipeline.analyst import filter_item
+from scout_pipeline import http_client
+from scout_pipeline.analyst import filter_item, filter_items
 from scout_pipeline.collector import collect_sources
+from scout_pipeline.concurrency import ordered_map
 from scout_pipeline.config import AppConfig
-from scout_pipeline.creator import create_thread
+from scout_pipeline.creator import create_thread, score_and_create
 from scout_pipeline.deduper import Deduper
 from scout_pipeline.extractor import normalize_items
-from scout_pipeline.media import download_media
-from scout_pipeline.models import Item, TweetThread
+from scout_pipeline.feed_state import FeedStateStore
+from scout_pipeline.llm_cache import LLMCache
+from scout_pipeline.maintenance import maintenance_due, run_maintenance
+from scout_pipeline.media import MediaDownloader
+from scout_pipeline.media_store import MediaStore
+from scout_pipeline.models import Item, LLMFilterResult, TweetThread
+from scout_pipeline.neardup import NearDuplicateIndex
 from scout_pipeline.notifier import notify_feishu_daily
-from scout_pipeline.report_store import record_report
-
-
-AI_STRONG_KEYWORDS = [
-    "ai",
-    "aigc",
-    "agi",
-    "llm",
-    "gpt",
-    "openai",
-    "altman",
-    "ilya",
-    "anthropic",
-    "claude",
-    "gemini",
-    "deepseek",
-    "minimax",
-    "kimi",
-    "qwen",
-    "copilot",
-    "cursor",
-    "mcp",
-    "rag",
-    "sora",
-    "人工智能",
-    "大模型",
-    "智能体",
-    "生成式",
-    "机器学习",
-    "深度学习",
-    "多模态",
-    "推理模型",
-    "语言模型",
-    "机器人",
-    "千问",
-    "通义",
-    "智谱",
-    "glm",
-    "豆包",
-    "文心",
-    "混元",
-    "奥特曼",
-]
-
-AI_CONTEXT_KEYWORDS = [
-    "模型",
-    "推理",
-    "训练",
-    "token",
-    "tokens",
-    "agent",
-    "prompt",
-    "embedding",
-    "transformer",
-    "生成",
-    "算力",
-    "算法",
-    "芯片",
-    "gpu",
-    "npu",
-]
+from scout_pipeline.prompting import prompt_stats
+from scout_pipeline.ranking import LLMQueue, LocalRanker, select_for_llm
+from scout_pipeline.relevance import RelevancePlan
+from scout_pipeline.report_store import attach_alternates, record_report
+
 
 FEISHU_PUSH_HOURS = {8, 12, 16, 20}
 CN_TZ = timezone(timedelta(hours=8))
 
 
-def _normalize_text(text: str) -> str:
-    return (text or "").lower()
-
-
-def _contains_any(text: str, keywords: list[str]) -> bool:
-    return any(keyword.lower() in text for keyword in keywords)
-
-
-def _count_keyword_hits(text: str, keywords: list[str]) -> int:
-    return sum(1 for keyword in keywords if keyword.lower() in text)
-
-
-def _looks_ai_related(item: Item) -> bool:
-    title = _normalize_text(item.title)
-    desc = _normalize_text(item.description)
-    text = f"{title} {desc}".strip()
-
-    strong_in_title = _contains_any(title, AI_STRONG_KEYWORDS)
-    strong_in_text = _contains_any(text, AI_STRONG_KEYWORDS)
-    context_title_hits = _count_keyword_hits(title, AI_CONTEXT_KEYWORDS)
-    context_hits = _count_keyword_hits(text, AI_CONTEXT_KEYWORDS)
-
-    source = (item.source or "").lower()
-    broad_source = source.startswith("36kr_") or source.startswith("infoq")
-    ai_focused_source = any(
-        key in source for key in ("qbitai", "jiqizhixin", "agi", "infoq")
-    )
-
-    if broad_source:
-        if strong_in_title:
-            return True
-        return context_title_hits >= 2
-
-    if strong_in_title:
-        return True
-    if strong_in_text and context_hits >= 1:
-        return True
-    if strong_in_text:
-        return True
-    if ai_focused_source and (context_title_hits >= 1 or context_hits >= 2):
-        return True
-
-    return context_hits >= 3
-
-
-def apply_keyword_filters(items: List[Item], allow: list[str], deny: list[str]) -> List[Item]:
-    filtered = []
-    for item in items:
-        text = _normalize_text(f"{item.title} {item.description}")
-        if deny and _contains_any(text, deny):
-            continue
-        if not _looks_ai_related(item):
-            continue
-        if allow and not _contains_any(text, allow):
-            continue
-        filtered.append(item)
-    return filtered
+def apply_keyword_filters(items: List[Item], plan: RelevancePlan) -> List[Item]:
+    # 相关性规则在 run_once 开始时编译成计划，整批条目一次评估。
+    if os.getenv("SCOUTX_EXPLAIN_RELEVANCE", "").strip().lower() in {"1", "true", "yes", "on"}:
+        for item in items:
+            print(plan.explain(item).format())
+    return plan.filter(items)
 
 
 def _should_push_feishu_daily(run_started_at: datetime) -> bool:
@@ -145,37 +45,137 @@ def _should_push_feishu_daily(run_started_at: datetime) -> bool:
     return local_dt.hour in FEISHU_PUSH_HOURS and local_dt.minute == 0
 
 
+def _process_item(
+    config: AppConfig,
+    downloader: MediaDownloader,
+    cache: LLMCache,
+    verdicts: Dict[int, LLMFilterResult],
+    item: Item,
+) -> Tuple[Item, Optional[TweetThread]]:
+    """在 LLM 工作线程里执行：打分（批量模式下已预先打好）、按需开始下载媒体、生成 thread；被拒绝时 thread 为 None。"""
+
+    if not config.llm.enabled:
+        summary = f"{item.title}\n{item.url}\n\n{item.description}".strip()
+        return item, TweetThread(tweets=[summary])
+    if config.llm.filter_mode == "combined":
+        _, thread = score_and_create(config.llm, item, config.filters.min_score, cache)
+        if thread is None:
+            downloader.discard(item)
+        elif config.media.download_policy == "accepted":
+            downloader.submit(item)
+        return item, thread
+    result = verdicts.get(id(item)) or filter_item(config.llm, item, cache)
+    if not result.passed or result.score < config.filters.min_score:
+        downloader.discard(item)
+        return item, None
+    if config.media.download_policy == "accepted":
+        # 通过筛选后才开始下载，与生成 thread 的调用重叠。
+        downloader.submit(item)
+    return item, create_thread(config.llm, item, cache)
+
+
 def run_once(config: AppConfig) -> None:
     run_started_at = datetime.now(CN_TZ)
-    raw_items = collect_sources(config.sources)
+    prompt_stats.reset()
+    http_client.configure(config.http)
+    relevance_plan = RelevancePlan.from_filters(config.filters)
+    feed_state = FeedStateStore(config.storage.sqlite_path)
+    raw_items = collect_sources(config.sources, config.collector, feed_state)
     normalized = normalize_items(raw_items)
-    filtered = apply_keyword_filters(normalized, config.filters.allow_keywords, config.filters.deny_keywords)
-
-    deduper = Deduper(config.storage.sqlite_path)
-    new_items = deduper.filter_new(filtered)
+    filtered = apply_keyword_filters(normalized, relevance_plan)
+
+    deduper = Deduper(config.storage.sqlite_path, config.dedup)
+    try:
+        new_items = deduper.filter_new(filtered)
+    finally:
+        deduper.close()
+    collapsed = 0
+    if config.dedup.near_duplicates:
+        # 同一内容的其他来源挂到首个条目上，不再重复走 LLM、入库和推送。
+        near_result = NearDuplicateIndex(config.storage.sqlite_path, config.dedup).collapse(new_items)
+        attach_alternates(config.storage.sqlite_path, near_result.attached, config.dedup.window_hours)
+        collapsed = near_result.collapsed
+        new_items = near_result.items
+
+    ranked = None
+    llm_queue = None
+    selected = new_items
+    if config.llm.enabled and config.ranking.enabled:
+        # 只把本地粗排的 top-K 送 LLM，其余排队到后续运行，单次运行的 LLM 开销有上限。
+        llm_queue = LLMQueue(config.storage.sqlite_path)
+        ranker = LocalRanker(config.ranking, relevance_plan)
+        ranked = select_for_llm(config.ranking, ranker, llm_queue, new_items)
+        print(
+            f"[ranking] new={len(new_items)} from_queue={ranked.from_queue} selected={len(ranked.selected)} "
+            f"deferred={ranked.deferred} expired={ranked.expired}"
+        )
+        selected = ranked.selected
 
     feishu_batch: list[tuple] = []
     processed = 0
 
-    for item in new_items:
-        item = download_media(config.media, item)
-        if config.llm.enabled:
-            result = filter_item(config.llm, item)
-            if not result.passed or result.score < config.filters.min_score:
+    media_store = MediaStore(config.media, config.storage.sqlite_path)
+    llm_cache = LLMCache(config.storage.sqlite_path, config.llm.cache)
+    download_policy = config.media.download_policy
+    # 不走 LLM 时每个条目都会入库，accepted 等同于 eager。
+    prefetch = download_policy == "eager" or (download_policy == "accepted" and not config.llm.enabled)
+    with MediaDownloader(config.media, media_store) as downloader:
+        # 媒体在后台并发下载，与 LLM 调用重叠；只在落库前等待对应条目。
+        if prefetch:
+            for item in selected:
+                downloader.submit(item)
+
+        # LLM 打分和生成并发执行（受 llm.max_concurrency 与限速约束），结果按原顺序落库。
+        workers = config.llm.max_concurrency if config.llm.enabled else 1
+        verdicts: Dict[int, LLMFilterResult] = {}
+        if config.llm.enabled and config.llm.filter_mode == "batch" and selected:
+            scored = filter_items(config.llm, selected, llm_cache, workers)
+            verdicts = {id(item): result for item, result in zip(selected, scored)}
+        results = ordered_map(
+            lambda item: _process_item(config, downloader, llm_cache, verdicts, item), selected, workers, name="llm"
+        )
+        for item, thread in results:
+            if thread is None:
+                continue
+            downloader.wait(item)
+            try:
+                record_report(config.storage.sqlite_path, item, thread)
+            except Exception as exc:
+                print(f"[report][warn] failed to save item: {item.source} {item.url} ({exc})")
                 continue
-            thread = create_thread(config.llm, item)
-        else:
-            summary = f"{item.title}\n{item.url}\n\n{item.description}".strip()
-            thread = TweetThread(tweets=[summary])
 
+            feishu_batch.append((item, thread))
+            processed += 1
+
+    if config.llm.enabled:
+        stats = prompt_stats.snapshot()
+        if stats["prompts"]:
+            print(
+                f"[prompt] prompts={stats['prompts']} truncated={stats['truncated']} "
+                f"field_tokens={stats['kept_tokens']} saved={stats['saved_tokens']} "
+                f"({stats['saved_tokens'] / max(stats['original_tokens'], 1):.0%})"
+            )
+
+    if config.llm.enabled and config.llm.cache.enabled:
         try:
-            record_report(config.storage.sqlite_path, item, thread)
+            pruned = llm_cache.prune()
+            stats = llm_cache.stats()
+            print(
+                f"[llm-cache] hits={stats['hits']} misses={stats['misses']} stores={stats['stores']} "
+                f"expired={pruned['expired']} evicted={pruned['evicted']}"
+            )
         except Exception as exc:
-            print(f"[report][warn] failed to save item: {item.source} {item.url} ({exc})")
-            continue
+            print(f"[llm-cache][warn] prune failed: {exc}")
 
-        feishu_batch.append((item, thread))
-        processed += 1
+    if llm_queue is not None:
+        llm_queue.remove(selected)
+
+    try:
+        evicted = media_store.evict()
+        if evicted["evicted"]:
+            print(f"[media] evicted={evicted['evicted']} freed_mb={evicted['freed_bytes'] / 1024 / 1024:.1f}")
+    except Exception as exc:
+        print(f"[media][warn] eviction failed: {exc}")
 
     if config.notifier.feishu_webhook:
         if _should_push_feishu_daily(run_started_at):
@@ -196,5 +196,13 @@ def run_once(config: AppConfig) -> None:
 
     print(
         f"[pipeline] collected={len(raw_items)} filtered={len(filtered)} "
-        f"new={len(new_items)} processed={processed}"
+        f"new={len(new_items)} collapsed={collapsed} selected={len(selected)} "
+        f"deferred={ranked.deferred if ranked else 0} processed={processed}"
     )
+
+    try:
+        if maintenance_due(config.storage.sqlite_path, config.maintenance):
+            details = run_maintenance(config.storage.sqlite_path, config.maintenance)
+            print(f"[maintenance] {details}")
+    except Exception as exc:
+        print(f"[maintenance][warn] failed: {exc}")
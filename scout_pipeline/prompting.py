@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import re
+import threading
+from typing import Dict, List
+
+from scout_pipeline.config import PROMPT_FIELDS, PromptBudgetConfig
+from scout_pipeline.models import Item
+
+# 中日韩文字：主流 BPE 词表里常用汉字约 1 token/字，生僻字更多，按 1 计偏保守。
+_CJK = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]")
+# 拉丁单词约 4 字符/token，数字约 3 位/token，其余标点符号（含全角）各算 1。
+_WORD = re.compile(r"[A-Za-z]+")
+_DIGITS = re.compile(r"\d+")
+_SYMBOL = re.compile(r"[^\sA-Za-z\d぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]")
+_ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """本地快速估算 token 数，针对中英混排调过系数，不依赖具体模型的分词器。"""
+
+    if not text:
+        return 0
+    return (
+        len(_CJK.findall(text))
+        + sum((len(word) + 3) // 4 for word in _WORD.findall(text))
+        + sum((len(digits) + 2) // 3 for digits in _DIGITS.findall(text))
+        + len(_SYMBOL.findall(text))
+    )
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """截断到不超过 budget 个 token，截断时末尾加省略号。"""
+
+    tokens = estimate_tokens(text)
+    if tokens <= budget:
+        return text
+    if budget <= 1:
+        return ""
+    # 按比例先切一刀，再每次缩 10% 直到落进预算（省略号占 1 个 token）。
+    keep = len(text) * (budget - 1) // tokens
+    while keep > 0 and estimate_tokens(text[:keep]) > budget - 1:
+        keep = keep * 9 // 10
+    return text[:keep].rstrip() + _ELLIPSIS if keep > 0 else ""
+
+
+def _truncate_comments(comments: List[str], budget: int) -> str:
+    # 评论按条保留，放不下的整条丢弃；第一条就放不下时截断它。
+    kept: List[str] = []
+    used = 0
+    for comment in comments:
+        cost = estimate_tokens(comment) + 1
+        if used + cost > budget:
+            if not kept:
+                kept.append(truncate_to_tokens(comment, budget))
+            break
+        kept.append(comment)
+        used += cost
+    return "\n".join(kept)
+
+
+class PromptStats:
+    """本次运行的 prompt 截断统计，多个 LLM 工作线程共用。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.prompts = 0
+            self.truncated = 0
+            self.original_tokens = 0
+            self.kept_tokens = 0
+
+    def record(self, original: int, kept: int) -> None:
+        with self._lock:
+            self.prompts += 1
+            self.truncated += int(kept < original)
+            self.original_tokens += original
+            self.kept_tokens += kept
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "prompts": self.prompts,
+                "truncated": self.truncated,
+                "original_tokens": self.original_tokens,
+                "kept_tokens": self.kept_tokens,
+                "saved_tokens": self.original_tokens - self.kept_tokens,
+            }
+
+
+prompt_stats = PromptStats()
+
+
+def budget_fields(item: Item, budget: PromptBudgetConfig) -> Dict[str, str]:
+    """按字段上限截断，合计仍超出 max_tokens 时按优先级从低到高继续压缩。"""
+
+    full = {"title": item.title, "description": item.description, "comments": "\n".join(item.comments)}
+    if not budget.enabled:
+        return full
+    original = {name: estimate_tokens(text) for name, text in full.items()}
+
+    fields: Dict[str, str] = {}
+    for name in PROMPT_FIELDS:
+        limit = budget.field_tokens.get(name)
+        if limit is None or original[name] <= limit:
+            fields[name] = full[name]
+        elif name == "comments":
+            fields[name] = _truncate_comments(item.comments, limit)
+        else:
+            fields[name] = truncate_to_tokens(full[name], limit)
+    tokens = {name: estimate_tokens(text) for name, text in fields.items()}
+
+    order = [name for name in budget.priority if name in fields]
+    order += [name for name in PROMPT_FIELDS if name not in order]
+    for name in reversed(order):
+        excess = sum(tokens.values()) - budget.max_tokens
+        if excess <= 0:
+            break
+        limit = max(tokens[name] - excess, 0)
+        if name == "comments":
+            fields[name] = _truncate_comments(fields[name].split("\n"), limit)
+        else:
+            fields[name] = truncate_to_tokens(fields[name], limit)
+        tokens[name] = estimate_tokens(fields[name])
+
+    prompt_stats.record(sum(original.values()), sum(tokens.values()))
+    return fields
+
+
+def render_prompt(template: str, item: Item, budget: PromptBudgetConfig) -> str:
+    fields = budget_fields(item, budget)
+    return template.format(
+        title=fields["title"],
+        url=item.url,
+        description=fields["description"],
+        comments=fields["comments"],
+    )
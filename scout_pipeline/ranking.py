@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from scout_pipeline.config import RankingConfig
+from scout_pipeline.models import AlternateSource, Item, MediaAsset
+from scout_pipeline.relevance import RelevancePlan
+from scout_pipeline.report_store import fingerprint_item
+
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _item_to_json(item: Item) -> str:
+    return json.dumps(asdict(item), ensure_ascii=False, default=str)
+
+
+def _item_from_json(text: str) -> Item:
+    data = json.loads(text)
+    data["media"] = [MediaAsset(**media) for media in data.get("media", [])]
+    data["alternates"] = [AlternateSource(**alt) for alt in data.get("alternates", [])]
+    return Item(**data)
+
+
+class LocalRanker:
+    """LLM 之前的廉价打分：关键词类别命中 + 源先验 + 新鲜度衰减。"""
+
+    def __init__(self, config: RankingConfig, plan: RelevancePlan) -> None:
+        self.config = config
+        self.matcher = plan.matcher
+        classes = list(self.matcher.classes)
+        for name in config.keyword_weights:
+            if name not in classes:
+                raise ValueError(f"Unknown keyword class in ranking.keyword_weights: {name}")
+        self._weights = [config.keyword_weights.get(name, 0.0) for name in classes]
+        self._priors = [(pattern.lower(), prior) for pattern, prior in config.source_priors.items()]
+        self._source_priors: Dict[str, float] = {}
+
+    def source_prior(self, source: str) -> float:
+        source = (source or "").lower()
+        if source not in self._source_priors:
+            self._source_priors[source] = next(
+                (prior for pattern, prior in self._priors if fnmatchcase(source, pattern)), 0.0
+            )
+        return self._source_priors[source]
+
+    def score(self, item: Item, now: datetime, first_seen: Optional[datetime] = None) -> float:
+        fields = self.matcher.field_hits(item.title, item.description)
+        title = self.matcher.count_vector(fields["title"])
+        description = self.matcher.count_vector(fields["description"])
+        score = sum(
+            weight * (self.config.title_boost * title_hits + desc_hits)
+            for weight, title_hits, desc_hits in zip(self._weights, title, description)
+        )
+        score += self.source_prior(item.source)
+        # 没有可解析的发布时间时按首次入队时间算新鲜度。
+        published = _parse_time(item.published_at) or first_seen or now
+        age_hours = max((now - published).total_seconds() / 3600, 0.0)
+        half_life = max(self.config.freshness_half_life_hours, 1e-6)
+        return score + self.config.freshness_weight * 0.5 ** (age_hours / half_life)
+
+
+class LLMQueue:
+    """排名靠后、本次没送 LLM 的条目；它们已经写入 items 表，离开队列就不会再出现。"""
+
+    def __init__(self, sqlite_path: str) -> None:
+        self.sqlite_path = sqlite_path
+        self._init_db()
+
+    def _init_db(self) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_queue (
+                    fingerprint TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    url TEXT,
+                    title TEXT,
+                    item_json TEXT NOT NULL,
+                    score REAL NOT NULL,
+                    enqueued_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(llm_queue)")}
+            if "url" not in columns:
+                # url/title 供 migrate_fingerprints 重算指纹，旧行从 item_json 回填。
+                conn.execute("ALTER TABLE llm_queue ADD COLUMN url TEXT")
+                conn.execute("ALTER TABLE llm_queue ADD COLUMN title TEXT")
+                conn.execute(
+                    "UPDATE llm_queue SET url=json_extract(item_json, '$.url'), title=json_extract(item_json, '$.title')"
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_queue_enqueued_at ON llm_queue (enqueued_at)")
+
+    def expire(self, max_age_hours: float) -> int:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            return conn.execute(
+                "DELETE FROM llm_queue WHERE enqueued_at <= datetime('now', ?)",
+                (f"-{max_age_hours} hours",),
+            ).rowcount
+
+    def load(self) -> List[Tuple[Item, datetime]]:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            rows = conn.execute("SELECT item_json, enqueued_at FROM llm_queue ORDER BY enqueued_at").fetchall()
+        queued: List[Tuple[Item, datetime]] = []
+        for item_json, enqueued_at in rows:
+            try:
+                queued.append((_item_from_json(item_json), _parse_time(enqueued_at)))
+            except (TypeError, ValueError):
+                continue
+        return queued
+
+    def push(self, entries: Sequence[Tuple[Item, float]]) -> None:
+        # 已在队列里的条目只更新分数，保留原入队时间。
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.executemany(
+                """
+                INSERT INTO llm_queue (fingerprint, source, url, title, item_json, score) VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(fingerprint) DO UPDATE SET score=excluded.score
+                """,
+                [
+                    (fingerprint_item(item), item.source, item.url, item.title, _item_to_json(item), score)
+                    for item, score in entries
+                ],
+            )
+
+    def remove(self, items: Sequence[Item]) -> None:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            conn.executemany(
+                "DELETE FROM llm_queue WHERE fingerprint=?",
+                [(fingerprint_item(item),) for item in items],
+            )
+
+    def size(self) -> int:
+        with sqlite3.connect(self.sqlite_path) as conn:
+            return conn.execute("SELECT COUNT(1) FROM llm_queue").fetchone()[0]
+
+
+@dataclass
+class RankResult:
+    selected: List[Item] = field(default_factory=list)
+    deferred: int = 0
+    from_queue: int = 0
+    expired: int = 0
+
+
+def select_for_llm(
+    config: RankingConfig,
+    ranker: LocalRanker,
+    queue: LLMQueue,
+    new_items: Sequence[Item],
+    now: Optional[datetime] = None,
+) -> RankResult:
+    """新条目与队列里的旧条目一起排序，按每次 / 每源上限取 top-K，其余写回队列。
+
+    选中的旧条目在处理完后由调用方 queue.remove()，中途崩溃时下次仍会被选中。
+    """
+
+    now = now or datetime.now(timezone.utc)
+    result = RankResult(expired=queue.expire(config.queue_max_age_hours))
+    queued = queue.load()
+    candidates: List[Tuple[Item, Optional[datetime]]] = [(item, None) for item in new_items] + list(queued)
+    scored = [(ranker.score(item, now, first_seen), idx, item) for idx, (item, first_seen) in enumerate(candidates)]
+    # 同分时保持原顺序：新条目在前，队列按入队先后。
+    scored.sort(key=lambda entry: (-entry[0], entry[1]))
+
+    per_source: Dict[str, int] = {}
+    deferred: List[Tuple[Item, float]] = []
+    for score, idx, item in scored:
+        run_full = 0 < config.max_items_per_run <= len(result.selected)
+        source_full = 0 < config.max_items_per_source <= per_source.get(item.source, 0)
+        if run_full or source_full:
+            deferred.append((item, score))
+            continue
+        per_source[item.source] = per_source.get(item.source, 0) + 1
+        result.selected.append(item)
+        result.from_queue += int(idx >= len(new_items))
+    queue.push(deferred)
+    result.deferred = len(deferred)
+    return result
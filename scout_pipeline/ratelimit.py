@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from scout_pipeline.config import LLMConfig
+from scout_pipeline.http_client import MAX_RETRY_AFTER
+
+# 429 没带 Retry-After 时全局暂停的秒数。
+DEFAULT_RETRY_AFTER = 5.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 可以是秒数或 HTTP 日期。"""
+
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+class TokenBucket:
+    """按分钟速率补充的令牌桶；reserve() 先记账再返回需要等待的秒数，允许余额为负。"""
+
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate)
+
+    def consume(self, amount: float) -> None:
+        """事后补记（例如实际 token 用量超过估算），不阻塞。"""
+
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+
+
+class LLMRateLimiter:
+    """同一 API/模型共享的请求数与 token 数限速，并在 429 时让所有线程一起暂停。"""
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0) -> None:
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        delay = 0.0
+        if self.requests is not None:
+            delay = max(delay, self.requests.reserve(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        with self._lock:
+            delay = max(delay, self._resume_at - time.monotonic())
+        if delay > 0:
+            time.sleep(delay)
+        return max(delay, 0.0)
+
+    def record_usage(self, estimated: int, actual: Optional[int]) -> None:
+        if self.tokens is not None and actual and actual > estimated:
+            self.tokens.consume(actual - estimated)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+
+_limiters: Dict[Tuple[str, str, int, int], LLMRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(config: LLMConfig) -> LLMRateLimiter:
+    key = (str(config.api_base), config.model, config.requests_per_minute, config.tokens_per_minute)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = LLMRateLimiter(config.requests_per_minute, config.tokens_per_minute)
+            _limiters[key] = limiter
+        return limiter
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from scout_pipeline.config import ALLOW_CLASS, DENY_CLASS, FilterConfig, RelevanceConfig
+from scout_pipeline.keywords import KeywordMatcher
+from scout_pipeline.models import Item
+
+
+@dataclass(frozen=True)
+class _CompiledRule:
+    feature: int
+    min_hits: int
+    weight: float
+
+
+@dataclass(frozen=True)
+class _CompiledProfile:
+    name: str
+    patterns: Tuple[str, ...]
+    rules: Tuple[_CompiledRule, ...]
+    threshold: float
+
+    def matches(self, source: str) -> bool:
+        return not self.patterns or any(fnmatchcase(source, pattern) for pattern in self.patterns)
+
+
+@dataclass
+class RuleTrace:
+    keyword_class: str
+    field: str
+    hits: int
+    min_hits: int
+    weight: float
+    fired: bool
+
+
+@dataclass
+class RelevanceTrace:
+    source: str
+    title: str
+    profile: Optional[str]
+    score: float
+    threshold: float
+    denied: bool
+    allowed: bool
+    passed: bool
+    rules: List[RuleTrace] = field(default_factory=list)
+    keywords: Dict[str, List[str]] = field(default_factory=dict)
+
+    def format(self) -> str:
+        lines = [
+            f"[relevance] {'PASS' if self.passed else 'DROP'} {self.source} | {self.title[:60]}",
+            f"  profile={self.profile} score={self.score:g}/{self.threshold:g} "
+            f"denied={self.denied} allowed={self.allowed}",
+        ]
+        for rule in self.rules:
+            lines.append(
+                f"  {'+' if rule.fired else ' '} {rule.keyword_class}@{rule.field} "
+                f"hits={rule.hits} min={rule.min_hits} weight={rule.weight:g}"
+            )
+        for name, keywords in self.keywords.items():
+            if keywords:
+                lines.append(f"  {name}: {', '.join(keywords)}")
+        return "\n".join(lines)
+
+
+class RelevancePlan:
+    """把 filters.relevance 的声明式规则编译成按批执行的评估计划。
+
+    每个条目只做一次关键词扫描得到特征向量（类别 x 字段的命中数），之后按源所属
+    profile 分组，对整批特征逐条规则累加权重。explain() 只在调试时调用，不影响热路径。
+    """
+
+    def __init__(self, relevance: RelevanceConfig, allow: Sequence[str] = (), deny: Sequence[str] = ()) -> None:
+        classes = {name: list(keywords) for name, keywords in relevance.keyword_classes.items()}
+        for reserved in (ALLOW_CLASS, DENY_CLASS):
+            if reserved in classes:
+                raise ValueError(f"Reserved keyword class name in relevance config: {reserved}")
+        self.matcher = KeywordMatcher({**classes, ALLOW_CLASS: list(allow), DENY_CLASS: list(deny)})
+        self._has_allow = bool(allow)
+        self._has_deny = bool(deny)
+
+        self._features: List[Tuple[str, str]] = []
+        self._feature_index: Dict[Tuple[str, str], int] = {}
+        self._deny_feature = self._feature("text", DENY_CLASS)
+        self._allow_feature = self._feature("text", ALLOW_CLASS)
+
+        profiles: List[_CompiledProfile] = []
+        for profile in relevance.profiles:
+            rules = []
+            for rule in profile.rules:
+                if rule.keyword_class not in classes:
+                    raise ValueError(
+                        f"Unknown keyword class in relevance profile {profile.name}: {rule.keyword_class}"
+                    )
+                rules.append(
+                    _CompiledRule(
+                        feature=self._feature(rule.field, rule.keyword_class),
+                        min_hits=rule.min_hits,
+                        weight=rule.weight,
+                    )
+                )
+            profiles.append(
+                _CompiledProfile(
+                    name=profile.name,
+                    patterns=tuple(pattern.lower() for pattern in profile.sources),
+                    rules=tuple(rules),
+                    threshold=profile.threshold,
+                )
+            )
+        self._profiles = profiles
+        # 特征按字段分组：每个条目每个字段只计数一次，再按类别下标取值。
+        class_index = {name: idx for idx, name in enumerate(self.matcher.classes)}
+        self._field_features: Tuple[Tuple[str, Tuple[Tuple[int, int], ...]], ...] = tuple(
+            (
+                field_name,
+                tuple(
+                    (feature_idx, class_index[keyword_class])
+                    for feature_idx, (name, keyword_class) in enumerate(self._features)
+                    if name == field_name
+                ),
+            )
+            for field_name in dict.fromkeys(name for name, _ in self._features)
+        )
+        self._source_profiles: Dict[str, Optional[int]] = {}
+
+    @classmethod
+    def from_filters(cls, filters: FilterConfig) -> "RelevancePlan":
+        return cls(filters.relevance, filters.allow_keywords, filters.deny_keywords)
+
+    def _feature(self, field_name: str, keyword_class: str) -> int:
+        key = (field_name, keyword_class)
+        if key not in self._feature_index:
+            self._feature_index[key] = len(self._features)
+            self._features.append(key)
+        return self._feature_index[key]
+
+    def profile_index(self, source: str) -> Optional[int]:
+        """按配置顺序取第一个匹配的 profile；没有匹配时不做相关性过滤。"""
+
+        source = (source or "").lower()
+        if source not in self._source_profiles:
+            self._source_profiles[source] = next(
+                (idx for idx, profile in enumerate(self._profiles) if profile.matches(source)),
+                None,
+            )
+        return self._source_profiles[source]
+
+    def features(self, item: Item) -> Tuple[int, ...]:
+        fields = self.matcher.field_hits(item.title, item.description)
+        values = [0] * len(self._features)
+        for field_name, features in self._field_features:
+            counts = self.matcher.count_vector(fields[field_name])
+            for feature_idx, class_idx in features:
+                values[feature_idx] = counts[class_idx]
+        return tuple(values)
+
+    def evaluate(self, items: Sequence[Item]) -> List[bool]:
+        if not items:
+            return []
+        columns = list(zip(*(self.features(item) for item in items)))
+
+        passed = [True] * len(items)
+        groups: Dict[int, List[int]] = {}
+        for idx, item in enumerate(items):
+            profile_idx = self.profile_index(item.source)
+            if profile_idx is not None:
+                groups.setdefault(profile_idx, []).append(idx)
+
+        for profile_idx, indices in groups.items():
+            profile = self._profiles[profile_idx]
+            scores = [0.0] * len(indices)
+            for rule in profile.rules:
+                column = columns[rule.feature]
+                scores = [
+                    score + rule.weight if column[idx] >= rule.min_hits else score
+                    for score, idx in zip(scores, indices)
+                ]
+            for score, idx in zip(scores, indices):
+                passed[idx] = score >= profile.threshold
+
+        if self._has_deny:
+            deny = columns[self._deny_feature]
+            passed = [ok and not deny[idx] for idx, ok in enumerate(passed)]
+        if self._has_allow:
+            allow = columns[self._allow_feature]
+            passed = [ok and bool(allow[idx]) for idx, ok in enumerate(passed)]
+        return passed
+
+    def filter(self, items: Sequence[Item]) -> List[Item]:
+        return [item for item, ok in zip(items, self.evaluate(items)) if ok]
+
+    def explain(self, item: Item) -> RelevanceTrace:
+        values = dict(zip(self._features, self.features(item)))
+        profile_idx = self.profile_index(item.source)
+        profile = self._profiles[profile_idx] if profile_idx is not None else None
+
+        rules: List[RuleTrace] = []
+        score = 0.0
+        for rule in profile.rules if profile else ():
+            field_name, keyword_class = self._features[rule.feature]
+            hits = values[(field_name, keyword_class)]
+            fired = hits >= rule.min_hits
+            score += rule.weight if fired else 0.0
+            rules.append(RuleTrace(keyword_class, field_name, hits, rule.min_hits, rule.weight, fired))
+
+        denied = self._has_deny and bool(values[("text", DENY_CLASS)])
+        allowed = not self._has_allow or bool(values[("text", ALLOW_CLASS)])
+        relevant = profile is None or score >= profile.threshold
+        keywords = self.matcher.group(self.matcher.hit_keywords(f"{item.title} {item.description}"))
+        return RelevanceTrace(
+            source=item.source,
+            title=item.title,
+            profile=profile.name if profile else None,
+            score=score,
+            threshold=profile.threshold if profile else 0.0,
+            denied=denied,
+            allowed=allowed,
+            passed=relevant and not denied and allowed,
+            rules=rules,
+            keywords=keywords,
+        )
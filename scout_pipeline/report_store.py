@@ -6,14 +6,19 @@ import sqlite3
 from datetime import date
 from typing import Any, Dict, Iterable, List, Tuple
 
-from scout_pipeline.models import Item, TweetThread
+from scout_pipeline.canonical import canonicalize_url
+from scout_pipeline.models import AlternateSource, Item, TweetThread
 
 
-def fingerprint_item(item: Item) -> str:
-    key = (item.url or item.title).encode("utf-8")
+def fingerprint_key(url: str, title: str) -> str:
+    key = (canonicalize_url(url) or title).encode("utf-8")
     return hashlib.md5(key).hexdigest()
 
 
+def fingerprint_item(item: Item) -> str:
+    return fingerprint_key(item.url, item.title)
+
+
 def _init_db(sqlite_path: str) -> None:
     with sqlite3.connect(sqlite_path) as conn:
         conn.execute(
@@ -36,6 +41,8 @@ def _init_db(sqlite_path: str) -> None:
         columns = {row[1] for row in conn.execute("PRAGMA table_info(reports)")}
         if "published_at" not in columns:
             conn.execute("ALTER TABLE reports ADD COLUMN published_at TEXT")
+        if "alternates_json" not in columns:
+            conn.execute("ALTER TABLE reports ADD COLUMN alternates_json TEXT")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS push_records (
@@ -46,6 +53,21 @@ def _init_db(sqlite_path: str) -> None:
             )
             """
         )
+        # 近似重复来源的归属报告还没入库（条目在 LLM 队列里）时先暂存，报告写入时再合并。
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pending_alternates (
+                report_id TEXT NOT NULL,
+                source TEXT NOT NULL,
+                url TEXT NOT NULL,
+                title TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (report_id, url)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_date_created ON reports (report_date, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_push_records_pushed_at ON push_records (pushed_at)")
 
 
 def record_report(sqlite_path: str, item: Item, thread: TweetThread) -> None:
@@ -67,12 +89,21 @@ def record_report(sqlite_path: str, item: Item, thread: TweetThread) -> None:
     fingerprint = fingerprint_item(item)
 
     with sqlite3.connect(sqlite_path) as conn:
+        alternates = [_alternate_dict(alt) for alt in item.alternates]
+        known = {alt["url"] for alt in alternates}
+        for source, url, title in conn.execute(
+            "SELECT source, url, title FROM pending_alternates WHERE report_id=? ORDER BY created_at", (fingerprint,)
+        ):
+            if url not in known:
+                known.add(url)
+                alternates.append({"source": source, "url": url, "title": title})
+        alternates_json = json.dumps(alternates, ensure_ascii=False)
         conn.execute(
             """
             INSERT OR IGNORE INTO reports (
                 id, report_date, source, title, url, published_at, description,
-                comments_json, media_json, thread_json
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                comments_json, media_json, thread_json, alternates_json
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 fingerprint,
@@ -85,8 +116,55 @@ def record_report(sqlite_path: str, item: Item, thread: TweetThread) -> None:
                 comments_json,
                 media_json,
                 thread_json,
+                alternates_json,
             ),
         )
+        conn.execute("DELETE FROM pending_alternates WHERE report_id=?", (fingerprint,))
+
+
+def _alternate_dict(alternate: AlternateSource) -> Dict[str, str]:
+    return {"source": alternate.source, "url": alternate.url, "title": alternate.title}
+
+
+def attach_alternates(
+    sqlite_path: str,
+    matches: Iterable[tuple[str, AlternateSource]],
+    pending_hours: float = 72,
+) -> int:
+    """把后续采集到的近似重复来源追加到已保存的报告上，返回更新的报告数。
+
+    报告还不存在的暂存到 pending_alternates，由 record_report 写入时合并；超过 pending_hours 的暂存丢弃。
+    """
+
+    grouped: Dict[str, List[AlternateSource]] = {}
+    for report_id, alternate in matches:
+        grouped.setdefault(report_id, []).append(alternate)
+    _init_db(sqlite_path)
+    updated = 0
+    with sqlite3.connect(sqlite_path) as conn:
+        conn.execute(
+            "DELETE FROM pending_alternates WHERE created_at < datetime('now', ?)", (f"-{pending_hours} hours",)
+        )
+        for report_id, alternates in grouped.items():
+            row = conn.execute("SELECT alternates_json FROM reports WHERE id=?", (report_id,)).fetchone()
+            if not row:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO pending_alternates (report_id, source, url, title) VALUES (?, ?, ?, ?)",
+                    [(report_id, alt.source, alt.url, alt.title) for alt in alternates],
+                )
+                continue
+            current = json.loads(row[0]) if row[0] else []
+            known = {entry["url"] for entry in current}
+            for alternate in alternates:
+                if alternate.url not in known:
+                    known.add(alternate.url)
+                    current.append(_alternate_dict(alternate))
+            conn.execute(
+                "UPDATE reports SET alternates_json=? WHERE id=?",
+                (json.dumps(current, ensure_ascii=False), report_id),
+            )
+            updated += 1
+    return updated
 
 
 def list_report_dates(sqlite_path: str, limit: int = 30) -> List[Tuple[str, int]]:
@@ -151,7 +229,8 @@ def fetch_reports(sqlite_path: str, report_date: str) -> List[Dict[str, Any]]:
         cur = conn.execute(
             """
             SELECT source, title, url, description,
-                   published_at, comments_json, media_json, thread_json, created_at
+                   published_at, comments_json, media_json, thread_json, created_at,
+                   alternates_json
             FROM reports
             WHERE report_date = ?
             ORDER BY created_at DESC
@@ -171,6 +250,7 @@ def fetch_reports(sqlite_path: str, report_date: str) -> List[Dict[str, Any]]:
                     "media": json.loads(row[6]) if row[6] else [],
                     "thread": json.loads(row[7]) if row[7] else [],
                     "created_at": row[8],
+                    "alternates": json.loads(row[9]) if row[9] else [],
                 }
             )
         return rows
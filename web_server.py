@@ -1,15 +1,66 @@
 from __future__ import annotations
 
 import html
+import mimetypes
+import os
+import re
+import shutil
 from datetime import date
 from http.server import BaseHTTPRequestHandler, HTTPServer
-from typing import Any
-from urllib.parse import parse_qs, urlparse
+from typing import Any, BinaryIO, Optional, Tuple
+from urllib.parse import parse_qs, quote, urlparse
 
+from scout_pipeline import http_client
+from scout_pipeline.config import MediaConfig
+from scout_pipeline.media import fetch_on_demand
+from scout_pipeline.media_store import MediaStore
 from scout_pipeline.report_store import fetch_reports, list_report_dates
 from scout_pipeline.utils import load_config
 
 config_path = "config.yaml"
+_media: Optional[Tuple[MediaConfig, MediaStore]] = None
+
+_RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+_COPY_CHUNK = 64 * 1024
+
+
+def _media_store() -> Tuple[MediaConfig, MediaStore]:
+    # 配置、共享 HTTP 连接池和 MediaStore 每个进程只建一次，不在每个请求里重复。
+    global _media
+    if _media is None:
+        config = load_config(config_path)
+        http_client.configure(config.http)
+        _media = (config.media, MediaStore(config.media, config.storage.sqlite_path))
+    return _media
+
+
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """解析单段 Range，返回闭区间 (start, end)；无法满足时抛 ValueError，多段或格式不认识时返回 None。"""
+
+    match = _RANGE_RE.match((header or "").strip())
+    if not match or not any(match.groups()):
+        return None
+    start, end = match.groups()
+    if not start:
+        # bytes=-N 表示最后 N 个字节。
+        length = int(end)
+        if length == 0 or size == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    first = int(start)
+    last = min(int(end), size - 1) if end else size - 1
+    if first >= size or first > last:
+        raise ValueError(header)
+    return first, last
+
+
+def _copy_range(handle: BinaryIO, output: BinaryIO, length: int) -> None:
+    while length > 0:
+        chunk = handle.read(min(_COPY_CHUNK, length))
+        if not chunk:
+            break
+        output.write(chunk)
+        length -= len(chunk)
 
 
 def _render_page(selected_date: str, dates: list[tuple[str, int]], reports: list[dict[str, Any]]) -> str:
@@ -26,7 +77,7 @@ def _render_page(selected_date: str, dates: list[tuple[str, int]], reports: list
         comments = "".join([f"<li>{html.escape(c)}</li>" for c in report["comments"]])
         media_links = "".join(
             [
-                f"<li><a href='{html.escape(m.get('url', ''))}' target='_blank'>"
+                f"<li><a href='/media?url={html.escape(quote(m.get('url', ''), safe=''))}' target='_blank'>"
                 f"{html.escape(m.get('url', ''))}</a></li>"
                 for m in report["media"]
                 if m.get("url")
@@ -181,6 +232,10 @@ class ReportHandler(BaseHTTPRequestHandler):
             self._write_response(200, "ok", "text/plain; charset=utf-8")
             return
 
+        if parsed.path == "/media":
+            self._serve_media(query.get("url", [""])[0])
+            return
+
         if parsed.path in ("/", ""):
             requested = query.get("date", [date.today().isoformat()])[0]
         elif parsed.path.startswith("/date/"):
@@ -198,6 +253,48 @@ class ReportHandler(BaseHTTPRequestHandler):
         html_body = _render_page(requested, dates, reports)
         self._write_response(200, html_body, "text/html; charset=utf-8")
 
+    def _serve_media(self, url: str) -> None:
+        # 优先返回本地副本，没有就按需下载；只服务报告里出现过的 URL，失败时跳回原链接。
+        media_config, store = _media_store()
+        if not url or not store.referenced(url):
+            self._write_response(404, "Not Found", "text/plain; charset=utf-8")
+            return
+        local_path = store.lookup(url) or fetch_on_demand(media_config, store, url)
+        try:
+            handle = open(local_path, "rb") if local_path else None
+        except FileNotFoundError:
+            handle = None
+        if handle is None:
+            self.send_response(302)
+            self.send_header("Location", url)
+            self.end_headers()
+            return
+        with handle:
+            size = os.fstat(handle.fileno()).st_size
+            try:
+                byte_range = _parse_range(self.headers.get("Range"), size)
+            except ValueError:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            start, end = byte_range or (0, size - 1)
+            self.send_response(206 if byte_range else 200)
+            self.send_header("Content-Type", mimetypes.guess_type(local_path)[0] or "application/octet-stream")
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            if byte_range:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Cache-Control", "max-age=86400")
+            self.end_headers()
+            # 大文件按块流式写出，不整体读进内存。
+            if byte_range:
+                handle.seek(start)
+                _copy_range(handle, self.wfile, end - start + 1)
+            else:
+                shutil.copyfileobj(handle, self.wfile, _COPY_CHUNK)
+
     def log_message(self, format: str, *args: object) -> None:
         return
 